@@ -5,5 +5,5 @@ class BackendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend'
 
-def ready(self):
-    import backend.signals
+    def ready(self):
+        import backend.signals
@@ -0,0 +1,95 @@
+"""
+Async (ASGI) variants of the analytics endpoints.
+
+DRF's @api_view is sync-only, so these are plain Django async views that
+authenticate with the same JWT class and return the same JSON. Each
+independent query runs through `concurrently`, i.e. on its own worker
+thread and database connection, so asyncio.gather genuinely overlaps
+them instead of queueing them on the single thread_sensitive executor
+that Django's a*() ORM methods use.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.utils.timezone import now
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+
+from . import reports
+from .authentication import StatelessJWTAuthentication
+from .response_cache import async_cached_response
+
+
+def concurrently(fn, *args):
+    """
+    Awaitable running fn(*args) on the loop's default thread pool. Each
+    pool thread keeps its own persistent connection, so the number of
+    extra connections is bounded by the pool size.
+    """
+    return sync_to_async(_in_worker, thread_sensitive=False)(fn, *args)
+
+
+def _in_worker(fn, *args):
+    # request_started/finished only tidy the request's own thread, so a
+    # pool thread drops its connections past CONN_MAX_AGE, or failing
+    # CONN_HEALTH_CHECKS, itself
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+def _error(detail, status):
+    return HttpResponse(JSONRenderer().render({"detail": detail}), status=status,
+                        content_type="application/json")
+
+
+def _unauthorized(detail):
+    response = _error(detail, 401)
+    response["WWW-Authenticate"] = 'Bearer realm="api"'
+    return response
+
+
+def jwt_required(view):
+    """Async counterpart of StatelessJWTAuthentication + IsAuthenticated for GET views."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return HttpResponse(status=405, headers={"Allow": "GET"})
+        try:
+            result = await concurrently(StatelessJWTAuthentication().authenticate, request)
+        except AuthenticationFailed as exc:
+            return _unauthorized(exc.detail)
+        if result is None:
+            return _unauthorized("Authentication credentials were not provided.")
+        request.user = result[0]
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@jwt_required
+@async_cached_response("dashboard")
+async def dashboard_summary(request):
+    user, current = request.user, now()
+    (monthly, yearly, unconverted), budget, recent = await asyncio.gather(
+        concurrently(reports.spending, user, current),
+        concurrently(reports.monthly_budget, user, current),
+        concurrently(reports.recent_transactions, user),
+    )
+    return reports.dashboard(monthly=monthly, budget=budget, yearly=yearly, recent=recent, unconverted=unconverted)
+
+
+@jwt_required
+@async_cached_response("annual_spending")
+async def annual_spending(request):
+    return await concurrently(reports.annual_spending, request.user)
+
+
+@jwt_required
+@async_cached_response("category_summary")
+async def category_summary(request):
+    return await concurrently(reports.category_summary, request.user)
@@ -0,0 +1,63 @@
+"""
+JWT authentication without a User query per request.
+
+simplejwt's JWTAuthentication loads the User row for every request, only
+to check that the account still exists and is active. This class keeps
+that check in an in-process LRU cache whose keys carry a time bucket, as
+backend.fx does for rates: a deactivated or deleted account is locked
+out within AUTH_STATE_CACHE_SECONDS everywhere, and at once in the
+process that saved it.
+
+request.user is a real User built from the token's user id with every
+other field deferred, so filters and foreign keys work with no query and
+the rare view that reads the email or checks the password loads the row
+on first access.
+"""
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+@lru_cache(maxsize=settings.AUTH_STATE_CACHE_SIZE)
+def _is_active(user_id, generation):
+    """True, False for a deactivated account, None for a deleted one."""
+    return (
+        get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        .values_list("is_active", flat=True).first()
+    )
+
+
+def _generation():
+    return int(time.monotonic() // settings.AUTH_STATE_CACHE_SECONDS)
+
+
+def forget():
+    """Drop cached account states, e.g. after a user was saved or deleted."""
+    _is_active.cache_clear()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication whose user comes from the token and a cached account check."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = self.user_model._meta.get_field(api_settings.USER_ID_FIELD).to_python(
+                validated_token[api_settings.USER_ID_CLAIM]
+            )
+        except (KeyError, ValidationError) as exc:
+            raise InvalidToken("Token contained no recognizable user identification") from exc
+
+        active = _is_active(user_id, _generation())
+        if active is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, [api_settings.USER_ID_FIELD], [user_id])
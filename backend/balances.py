@@ -0,0 +1,303 @@
+"""
+Incremental maintenance of DailyBalance, the running balance per day.
+
+Like MonthlyRollup, balances stay in the transactions' own currency:
+each of a user's currencies is a running balance of its own (a
+"ledger" below), and `timeline` converts them with backend.fx on read.
+
+Write paths fold their changes into a dict of deltas keyed by
+(user_id, date, currency) and hand it to `apply` after the write, inside
+the same atomic block, as with backend.rollups. A change on day D moves
+the closing balance of D and of every later day, so `apply` walks the
+touched days in order and shifts each stretch of later rows with one
+UPDATE. A back-dated edit therefore costs one UPDATE per touched day,
+however many transactions come after it. A ledger with many touched days
+(an import) is rebuilt from the earliest one instead, and other large
+sets of changes (bulk edits, the recurring worker) are applied for all
+their ledgers together with a few bulk queries. A new day's row that
+loses a race with a concurrent write of the same day (possible on
+PostgreSQL) is added to instead.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+
+from . import database, fx
+from .models import DailyBalance, Transaction, User
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+# More touched days than this for one ledger and rebuilding from the
+# first of them is cheaper than shifting the later rows stretch by stretch.
+REBUILD_THRESHOLD = 64
+# More touched (ledger, day) pairs than this in one `apply`, across all
+# users, and they are shifted together with bulk queries.
+BULK_THRESHOLD = 32
+
+
+def add(deltas, user_id, tx_date, currency, amount, sign=1):
+    """Fold one transaction (sign=+1 added, -1 removed) into `deltas`."""
+    key = (user_id, tx_date, currency)
+    total, count = deltas.get(key, (ZERO, 0))
+    deltas[key] = (total + sign * Decimal(amount), count + sign)
+    return deltas
+
+
+def add_instance(deltas, tx, sign=1):
+    return add(deltas, tx.user_id, tx.date, tx.currency, tx.amount, sign)
+
+
+def grouped(queryset, *ordering):
+    """
+    Net change and row count per (user, currency, day) of a Transaction
+    queryset. SQLite sums decimals as floats, so totals are rounded back
+    to cents.
+    """
+    rows = (
+        queryset.values("user_id", "currency", "date")
+        .annotate(total=Sum("amount"), n=Count("id")).order_by(*ordering)
+    )
+    for row in rows.iterator(chunk_size=2000):
+        row["total"] = row["total"].quantize(CENT)
+        yield row
+
+
+def add_queryset(deltas, queryset, sign=1):
+    """Fold every row of `queryset` into `deltas` without loading the rows."""
+    for row in grouped(queryset):
+        key = (row["user_id"], row["date"], row["currency"])
+        total, count = deltas.get(key, (ZERO, 0))
+        deltas[key] = (total + sign * row["total"], count + sign * row["n"])
+    return deltas
+
+
+def add_moved(deltas, queryset, new_date):
+    """
+    Fold a bulk re-date of `queryset` to `new_date` into `deltas`. Must
+    run before the UPDATE, while the old dates are still there.
+    """
+    for row in grouped(queryset):
+        old, new = (row["user_id"], row["date"], row["currency"]), (row["user_id"], new_date, row["currency"])
+        for key, sign in ((old, -1), (new, 1)):
+            total, count = deltas.get(key, (ZERO, 0))
+            deltas[key] = (total + sign * row["total"], count + sign * row["n"])
+    return deltas
+
+
+def apply(deltas):
+    """Write accumulated deltas. Run it after the transactions themselves are written."""
+    by_ledger = {}
+    for (user_id, day, currency), change in deltas.items():
+        if change[0] or change[1]:
+            by_ledger.setdefault((user_id, currency), []).append((day, change))
+    shifts = {}
+    for (user_id, currency), changes in by_ledger.items():
+        changes.sort()
+        if len(changes) > REBUILD_THRESHOLD:
+            _rebuild_ledger(user_id, currency, since=changes[0][0])
+        else:
+            shifts[user_id, currency] = changes
+    if sum(map(len, shifts.values())) > BULK_THRESHOLD:
+        _shift_many(shifts)
+    else:
+        for (user_id, currency), changes in shifts.items():
+            _shift(user_id, currency, changes)
+
+
+def _shift(user_id, currency, changes):
+    rows = DailyBalance.objects.filter(user_id=user_id, currency=currency)
+    running = ZERO
+    for n, (day, (total, count)) in enumerate(changes):
+        running += total
+        # rows from this day up to the next touched day move by everything so far
+        stretch = rows.filter(date__gt=day)
+        if n + 1 < len(changes):
+            stretch = stretch.filter(date__lt=changes[n + 1][0])
+        if running:
+            stretch.update(balance=F("balance") + running)
+
+        increments = {"delta": F("delta") + total, "balance": F("balance") + running, "count": F("count") + count}
+        if not rows.filter(date=day).update(**increments):
+            previous = rows.filter(date__lt=day).order_by("-date").values_list("balance", flat=True).first()
+            try:
+                with transaction.atomic():
+                    DailyBalance.objects.create(
+                        user_id=user_id, currency=currency, date=day, delta=total,
+                        balance=(previous or ZERO) + total, count=count,
+                    )
+                continue
+            except IntegrityError:
+                # created by a concurrent write since the UPDATE: add to it
+                rows.filter(date=day).update(**increments)
+        if count < 0:
+            rows.filter(date=day, count__lte=0).delete()
+
+
+def _shift_many(by_ledger, batch_size=500):
+    """
+    `_shift` for many days or ledgers at once. Their rows from the first
+    touched day on, and the balance before it, are read with one query
+    each per distinct first day and currency, recomputed in Python and
+    written back in bulk.
+    """
+    firsts = {}
+    for (user_id, currency), changes in by_ledger.items():
+        firsts.setdefault((changes[0][0], currency), []).append(user_id)
+    stored, opening = {}, {}
+    for (day, currency), user_ids in firsts.items():
+        rows = DailyBalance.objects.select_for_update().filter(
+            user_id__in=user_ids, currency=currency, date__gte=day,
+        )
+        for row in rows.order_by("user_id", "date"):
+            stored.setdefault((row.user_id, currency), {})[row.date] = row
+        before = (
+            DailyBalance.objects.filter(user_id=OuterRef("pk"), currency=currency, date__lt=day)
+            .order_by("-date").values("balance")[:1]
+        )
+        for user_id, balance in (
+            User.objects.filter(pk__in=user_ids).annotate(balance=Subquery(before)).values_list("pk", "balance")
+        ):
+            opening[user_id, currency] = balance
+
+    updated, created, emptied = [], [], []
+    for ledger, changes in by_ledger.items():
+        user_id, currency = ledger
+        balance = opening.get(ledger) or ZERO
+        rows, changes = stored.get(ledger, {}), dict(changes)
+        for day in sorted(rows.keys() | changes.keys()):
+            total, count = changes.get(day, (ZERO, 0))
+            row = rows.get(day)
+            if row is None:
+                balance += total
+                created.append(DailyBalance(
+                    user_id=user_id, currency=currency, date=day, delta=total, balance=balance, count=count,
+                ))
+                continue
+            row.delta += total
+            row.count += count
+            balance += row.delta
+            if row.count <= 0:
+                emptied.append(row)
+            elif total or count or row.balance != balance:
+                row.balance = balance
+                updated.append(row)
+    database.bulk_update(updated, ["delta", "balance", "count"], batch_size=batch_size)
+    if emptied:
+        DailyBalance.objects.filter(id__in=[row.id for row in emptied]).delete()
+    try:
+        with transaction.atomic():
+            DailyBalance.objects.bulk_create(created, batch_size=batch_size)
+    except IntegrityError:
+        # a concurrent write added a day the locked read couldn't see: those
+        # ledgers are recomputed from the transactions instead
+        for ledger in {(row.user_id, row.currency) for row in created}:
+            _rebuild_ledger(*ledger, since=by_ledger[ledger][0][0])
+
+
+def record(tx, sign=1):
+    """Shortcut for a single transaction write."""
+    apply(add_instance({}, tx, sign))
+
+
+def _rebuild_ledger(user_id, currency, since=None, batch_size=1000):
+    rows = DailyBalance.objects.filter(user_id=user_id, currency=currency)
+    transactions = Transaction.objects.filter(user_id=user_id, currency=currency)
+    balance = ZERO
+    if since is not None:
+        balance = rows.filter(date__lt=since).order_by("-date").values_list("balance", flat=True).first() or ZERO
+        rows = rows.filter(date__gte=since)
+        transactions = transactions.filter(date__gte=since)
+    rows.delete()
+
+    created = 0
+    batch = []
+    for row in grouped(transactions, "date"):
+        balance += row["total"]
+        batch.append(DailyBalance(
+            user_id=user_id, currency=currency, date=row["date"], delta=row["total"], balance=balance,
+            count=row["n"],
+        ))
+        if len(batch) >= batch_size:
+            DailyBalance.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    DailyBalance.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    """Recompute DailyBalance rows from the ledger for the selected users (default: all)."""
+    transactions = Transaction.objects.all()
+    rows = DailyBalance.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        rows = rows.filter(user_id__in=user_ids)
+    created = 0
+    with transaction.atomic():
+        rows.delete()
+        ledgers = transactions.values_list("user_id", "currency").distinct().order_by()
+        for user_id, currency in list(ledgers):
+            created += _rebuild_ledger(user_id, currency, batch_size=batch_size)
+    return created
+
+
+def timeline(user, start, end):
+    """
+    Opening balance, the days with activity between `start` and `end`
+    (inclusive) and the closing balance, in the profile currency. Per
+    currency: one range scan of the (user, currency, date) index and one
+    seek for the balance before `start`.
+
+    Each currency's balance is converted at the rate of the day it is
+    reported for, so from one point to the next the balance also moves
+    with the rates; `change` is the day's own transactions, converted.
+    A currency without a rate on one of those days is left out
+    altogether and listed under "unconverted".
+    """
+    target = fx.currency_of(user)
+    rows = DailyBalance.objects.filter(user=user)
+    opening, points = {}, {}
+    for currency in rows.values_list("currency", flat=True).distinct().order_by():
+        ledger = rows.filter(currency=currency)
+        before = ledger.filter(date__lt=start).order_by("-date").values_list("balance", flat=True).first() or ZERO
+        during = list(
+            ledger.filter(date__gte=start, date__lte=end).order_by("date").values_list("date", "delta", "balance")
+        )
+        if before or during:        # nothing to convert otherwise
+            opening[currency], points[currency] = before, during
+
+    days = sorted({start, end}.union(*({day for day, _, _ in ledger} for ledger in points.values())))
+    rates, unconverted = {}, []
+    for currency in opening:
+        found = fx.rates_by_day(currency, target, days)
+        if len(found) < len(days):
+            unconverted.append(fx.normalize(currency))
+        else:
+            rates[currency] = found
+
+    by_day = {}
+    for currency in rates:
+        for day, delta, balance in points[currency]:
+            by_day.setdefault(day, []).append((currency, delta, balance))
+    balances = {currency: opening[currency] for currency in rates}
+
+    def total(day):
+        return sum((balance * rates[currency][day] for currency, balance in balances.items()), ZERO).quantize(CENT)
+
+    converted_opening = total(start)
+    converted = []
+    for day in sorted(by_day):
+        change = ZERO
+        for currency, delta, balance in by_day[day]:
+            balances[currency] = balance
+            change += delta * rates[currency][day]
+        converted.append({"date": day, "change": change.quantize(CENT), "balance": total(day)})
+    return {
+        "from":        start,
+        "to":          end,
+        "opening":     converted_opening,
+        "closing":     total(end),
+        "points":      converted,
+        "unconverted": sorted(set(unconverted)),
+    }
@@ -0,0 +1,187 @@
+"""
+Shared plumbing for the bench_* management commands: a test client that
+gets past ALLOWED_HOSTS, a response cache to measure, throwaway data that is rolled back afterwards,
+timing helpers and a JSON results file that can be diffed between
+commits.
+"""
+import json
+import platform
+import random
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import balances, rollups
+from .models import Budget, Category, Transaction
+from .utils import default_categories
+
+
+# Password given to generated users, so the token endpoints can be exercised.
+SYNTHETIC_PASSWORD = "synthetic-password"
+
+
+def test_server():
+    """
+    Let Django's test clients through for the block. They send
+    Host: testserver, which the shipped ALLOWED_HOSTS rejects, so every
+    request would otherwise be timed as a 400 error page.
+    """
+    return override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+
+
+def response_cache():
+    """
+    A response cache in this process for the block. A server needs one
+    its workers share (RESPONSE_CACHE), but a benchmark is one process.
+    """
+    return override_settings(CACHES={
+        **settings.CACHES,
+        "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench-responses"},
+    })
+
+
+def api_client(user=None, token=False):
+    """
+    An APIClient for `user`: force-authenticated, or with a real access
+    token when the authentication step itself is being measured. Use it
+    inside test_server().
+    """
+    client = APIClient()
+    if user is not None and token:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    elif user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+def expect_success(response, label):
+    """The response, or CommandError if it is not a 2xx: error pages are not results."""
+    if not 200 <= response.status_code < 300:
+        raise CommandError(f"{label}: HTTP {response.status_code}")
+    return response
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+MERCHANTS = {
+    "Food":           ["Blue Bottle Coffee", "Whole Foods", "Trader Joe's", "Chipotle", "Corner Bakery"],
+    "Transportation": ["Shell", "Uber", "Lyft", "Metro Transit", "City Parking"],
+    "Utilities":      ["Electric Co", "Water Dept", "Comcast", "Verizon Wireless"],
+    "Entertainment":  ["Netflix", "Spotify", "AMC Theatres", "Steam", "Ticketmaster"],
+    "Income":         ["Payroll", "Interest", "Refund", "Freelance invoice"],
+}
+
+
+def make_ledger(username, rows, years=3, seed=0, password=None, password_hash=None, batch_size=5000):
+    """
+    A user with the default categories, a budget per expense category per
+    month and `rows` transactions spread over the last `years` years, with
+    rollups and daily balances built. Pass `password_hash` (from
+    make_password) to avoid hashing once per user when seeding many users.
+    """
+    rng = random.Random(seed)
+    User = get_user_model()
+    if password_hash is not None:
+        user = User.objects.create(username=username, email=username, password=password_hash)
+    else:
+        user = User.objects.create_user(username=username, email=username, password=password)
+    categories = Category.objects.bulk_create([
+        Category(user=user, **cat) for cat in default_categories()
+    ])
+    ids = {cat.name: cat.id for cat in categories}
+    # mostly spending, some income
+    weights = [1 if name == "Income" else 4 for name in ids]
+    names = list(ids)
+
+    today = date.today()
+    first = today.replace(day=1)
+    months = [(first - timedelta(days=31 * i)).replace(day=1) for i in range(12 * years)]
+    Budget.objects.bulk_create([
+        Budget(category=cat, amount=Decimal(rng.randint(100, 1000)), month=month)
+        for cat in categories if cat.type == "expense"
+        for month in months
+    ])
+
+    span = 365 * years
+    batch = []
+    for i in range(rows):
+        name = rng.choices(names, weights)[0]
+        cents = rng.randint(1000, 500000) if name == "Income" else -rng.randint(100, 20000)
+        batch.append(Transaction(
+            user=user,
+            amount=Decimal(cents) / 100,
+            date=today - timedelta(days=rng.randrange(span)),
+            description=f"{rng.choice(MERCHANTS.get(name, [name]))} #{i}",
+            category=name,
+            category_fk_id=ids[name],
+        ))
+        if len(batch) >= batch_size:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    Transaction.objects.bulk_create(batch)
+    rollups.rebuild(user_ids=[user.id])
+    balances.rebuild(user_ids=[user.id])
+    return user
+
+
+def timings(fn, repeat):
+    """Wall-clock seconds of `repeat` calls to fn()."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, suite, results, **params):
+    """Dump results with enough context to compare runs across commits."""
+    payload = {
+        "suite":    suite,
+        "revision": git_revision(),
+        "python":   platform.python_version(),
+        "params":   params,
+        "results":  results,
+    }
+    with open(path, "w") as fh:
+        json.dump(payload, fh, indent=2, default=str)
@@ -0,0 +1,87 @@
+"""
+Per-connection database tuning.
+
+SQLite keeps most settings per connection, so `configure` runs on every
+new connection (connection_created) and applies settings.SQLITE_PRAGMAS.
+The production profile in config/settings.py turns on WAL (readers no
+longer block the writer), synchronous=NORMAL (safe with WAL, one fsync
+per checkpoint instead of per commit), a larger page cache and mmap
+window, and a busy timeout so writers queue instead of failing with
+"database is locked".
+
+`bulk_update` is a faster Model.objects.bulk_update for the bulk write
+paths.
+"""
+from django.conf import settings
+from django.db import connections, router
+
+
+def configure(connection):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None)
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def pragma(connection, name):
+    """Current value of one pragma, e.g. pragma(connection, "journal_mode")."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _update_from_supported(connection):
+    if connection.vendor == "postgresql":
+        return True
+    return connection.vendor == "sqlite" and connection.Database.sqlite_version_info >= (3, 33)
+
+
+def bulk_update(objs, fields, batch_size=None):
+    """
+    Write `fields` of already-saved `objs` (all of one model) back with
+    one UPDATE ... FROM (VALUES ...) per batch. Django's bulk_update builds
+    a CASE WHEN per row and field, and compiling that costs more than the
+    query itself once batches reach the thousands. Falls back to it where
+    UPDATE ... FROM is missing (SQLite before 3.33, other databases).
+    """
+    if not objs:
+        return
+    model = type(objs[0])
+    connection = connections[router.db_for_write(model)]
+    if not _update_from_supported(connection):
+        model._base_manager.bulk_update(objs, fields, batch_size=batch_size)
+        return
+
+    pk = model._meta.pk
+    columns = [pk] + [model._meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    if connection.vendor == "postgresql":
+        # VALUES columns get no type from parameters alone
+        placeholder = "(%s)" % ", ".join(f"%s::{field.db_type(connection)}" for field in columns)
+    else:
+        placeholder = "(%s)" % ", ".join(["%s"] * len(columns))
+    assignments = ", ".join(
+        f"{quote(field.column)} = v.column{n}" for n, field in enumerate(columns[1:], 2)
+    )
+    size = connection.ops.bulk_batch_size(columns, objs)
+    if batch_size:
+        size = min(size, batch_size)
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), size):
+            batch = objs[start:start + size]
+            params = [
+                field.get_db_prep_save(getattr(obj, field.attname), connection)
+                for obj in batch for field in columns
+            ]
+            cursor.execute(
+                f"UPDATE {table} SET {assignments} "
+                f"FROM (VALUES {', '.join([placeholder] * len(batch))}) AS v "
+                f"WHERE {table}.{quote(pk.column)} = v.column1",
+                params,
+            )
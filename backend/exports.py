@@ -0,0 +1,143 @@
+"""
+Streaming ledger exports: CSV, NDJSON and Parquet.
+
+Rows are read with values_list().iterator(chunk_size=...) and encoded a
+chunk at a time, so memory stays flat however long the ledger is: only
+one chunk of rows (and, for Parquet, one row group) is alive at once.
+Columns and value formatting are those of TransactionSerializer, via
+its fastjson ValuesSerializer.
+"""
+import csv
+import io
+
+from rest_framework.negotiation import DefaultContentNegotiation
+
+from . import fastjson
+from .serializers import FastTransactionSerializer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only the Parquet export needs it
+    pa = pq = None
+
+CHUNK_SIZE = 2000
+ROW_GROUP_SIZE = 50000          # Parquet readers prefer fewer, larger row groups
+FIELDS = FastTransactionSerializer.fields
+
+
+def _rows(queryset, chunk_size):
+    return FastTransactionSerializer(queryset).iterator(chunk_size=chunk_size)
+
+
+def _batches(queryset, chunk_size):
+    batch = []
+    for row in _rows(queryset, chunk_size):
+        batch.append(row)
+        if len(batch) == chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    for batch in _batches(queryset, chunk_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()             # header of an empty export
+
+
+def stream_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    for batch in _batches(queryset, chunk_size):
+        yield b"".join(fastjson.dumps(row) + b"\n" for row in batch)
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("description", pa.string()),
+        ("amount", pa.decimal128(10, 2)),
+        ("currency", pa.string()),
+        ("date", pa.date32()),
+        ("category", pa.string()),
+    ])
+
+
+def _table(rows, schema):
+    columns = zip(*rows)
+    return pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                                schema=schema)
+
+
+def stream_parquet(queryset, row_group_size=ROW_GROUP_SIZE):
+    """
+    One Parquet file, written and flushed one row group at a time. Values
+    are read raw (Decimal, date) rather than in their JSON forms.
+    """
+    schema = _parquet_schema()
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    rows = queryset.values_list(*schema.names).iterator(chunk_size=row_group_size)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == row_group_size:
+            writer.write_table(_table(batch, schema))
+            batch = []
+            yield sink.drain()
+    if batch:
+        writer.write_table(_table(batch, schema))
+    writer.close()
+    yield sink.drain()
+
+
+# format -> (content type, file extension, stream function)
+FORMATS = {
+    "csv":     ("text/csv; charset=utf-8", "csv", stream_csv),
+    "ndjson":  ("application/x-ndjson", "ndjson", stream_ndjson),
+    "parquet": ("application/vnd.apache.parquet", "parquet", stream_parquet),
+}
+
+
+class ExportNegotiation(DefaultContentNegotiation):
+    """
+    ?format= names the export format, which the export view checks
+    itself so an unknown one is a 400. DRF would read it as a renderer
+    override and answer 404 before the view runs. The body is streamed
+    by the view, so only errors raised before it (401, 403) are rendered,
+    as JSON.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -0,0 +1,99 @@
+"""
+Read-only fast path for the big list endpoints.
+
+Rows come straight from values_list() - no model instances, no per-field
+serializer objects - and are encoded with orjson when it is installed.
+The field list and value formatting are derived from the regular
+ModelSerializer, and the bytes match what DRF's JSONRenderer produces
+for it.
+"""
+import json
+from decimal import Decimal
+
+from django.http import HttpResponse
+from rest_framework import serializers
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def dumps(data):
+    """Compact UTF-8 JSON, identical to rest_framework's JSONRenderer output."""
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    # JSONRenderer escapes these two so the output is valid JavaScript
+    if b"\xe2\x80\xa8" in body or b"\xe2\x80\xa9" in body:
+        body = body.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+    return body
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
+
+
+def wants_plain_json(request):
+    """True when DRF negotiated plain JSON (not the browsable API or ?indent)."""
+    renderer = getattr(request, "accepted_renderer", None)
+    media_type = getattr(request, "accepted_media_type", "") or ""
+    return renderer is not None and renderer.format == "json" and "indent" not in media_type
+
+
+def _converter(field):
+    if isinstance(field, serializers.DecimalField):
+        quantum = Decimal(1).scaleb(-field.decimal_places)
+        return lambda value: "{:f}".format(value.quantize(quantum))
+    if isinstance(field, serializers.DateField):
+        return lambda value: value.isoformat()
+    return None
+
+
+class ValuesSerializer:
+    """
+    Stand-in for `SomeModelSerializer(queryset, many=True).data` on read
+    paths. Subclasses are built with `values_serializer_for`.
+    """
+    fields = ()
+    converters = ()
+
+    def __init__(self, instance, many=True):
+        self.instance = instance
+
+    @property
+    def data(self):
+        return list(self._rows(self.instance.values_list(*self.fields)))
+
+    def iterator(self, chunk_size=2000):
+        """Like .data, but yields the rows as the cursor delivers them, `chunk_size` at a time."""
+        return self._rows(self.instance.values_list(*self.fields).iterator(chunk_size=chunk_size))
+
+    def _rows(self, rows):
+        fields = self.fields
+        converters = self.converters
+        for row in rows:
+            if converters:
+                row = list(row)
+                for index, convert in converters:
+                    if row[index] is not None:
+                        row[index] = convert(row[index])
+            yield dict(zip(fields, row))
+
+
+def values_serializer_for(serializer_class):
+    """Build a ValuesSerializer with the readable fields of `serializer_class`."""
+    readable = [
+        (name, field)
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    ]
+    return type(f"Fast{serializer_class.__name__}", (ValuesSerializer,), {
+        "fields": tuple(name for name, _ in readable),
+        "converters": tuple(
+            (index, convert)
+            for index, (_, field) in enumerate(readable)
+            if (convert := _converter(field)) is not None
+        ),
+    })
@@ -0,0 +1,81 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from .search import search_terms, search_transactions
+
+# Keys understood by filter_transactions, shared by the list and bulk endpoints.
+TRANSACTION_FILTERS = ("date_from", "date_to", "category", "amount_min", "amount_max", "type", "search")
+
+
+def parse_date(value, name):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError as exc:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date") from exc
+
+
+def _decimal(value, name):
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation as exc:
+        raise ValueError(f"{name} must be a number") from exc
+    if not number.is_finite():      # NaN and Infinity parse, but the ORM rejects them
+        raise ValueError(f"{name} must be a number")
+    return number
+
+
+def active_filters(params):
+    """
+    The keys of `params` that filter_transactions would narrow by: known,
+    not blank, and for search, with at least one word in it.
+    """
+    active = []
+    for name in TRANSACTION_FILTERS:
+        value = params.get(name)
+        if name == "search":
+            if search_terms(str(value or "")):
+                active.append(name)
+        elif value is not None and str(value).strip():
+            active.append(name)
+    return active
+
+
+def filter_transactions(queryset, params):
+    """
+    Narrow a Transaction queryset with the shared filter keys in `params`
+    (any dict-like, e.g. request.query_params or a JSON object). Blank
+    values are ignored; malformed ones raise ValueError.
+    """
+    value = params.get("date_from")
+    if value not in (None, ""):
+        queryset = queryset.filter(date__gte=parse_date(value, "date_from"))
+
+    value = params.get("date_to")
+    if value not in (None, ""):
+        queryset = queryset.filter(date__lte=parse_date(value, "date_to"))
+
+    value = params.get("category")
+    if value not in (None, ""):
+        queryset = queryset.filter(category=value)
+
+    value = params.get("amount_min")
+    if value not in (None, ""):
+        queryset = queryset.filter(amount__gte=_decimal(value, "amount_min"))
+
+    value = params.get("amount_max")
+    if value not in (None, ""):
+        queryset = queryset.filter(amount__lte=_decimal(value, "amount_max"))
+
+    value = params.get("type")
+    if value == "income":
+        queryset = queryset.filter(amount__gt=0)
+    elif value == "expense":
+        queryset = queryset.filter(amount__lt=0)
+    elif value not in (None, ""):
+        raise ValueError("type must be 'income' or 'expense'")
+
+    value = params.get("search")
+    if value:
+        queryset = search_transactions(queryset, str(value))
+
+    return queryset
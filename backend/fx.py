@@ -0,0 +1,167 @@
+"""
+Currency conversion against the local FxRate table.
+
+`rate(base, quote, day)` is the latest rate on or before `day`: the
+direct pair, else the inverse of the reverse pair, else a cross through
+settings.FX_PIVOT. Rates found are memoized in an in-process LRU cache
+whose keys include a time bucket, so rates loaded later by load_fx_rates
+reach running processes within FX_RATE_CACHE_SECONDS; misses are not
+memoized, so a pair with no rate is looked up again next time.
+
+Aggregates are converted per group, never per row. The reports convert
+each (month, currency) total of MonthlyRollup at the rate of the month's
+last day (today, for the current month); the NumPy trends convert whole
+arrays with one rate series per currency (`history`).
+
+A missing rate never fails a report: amounts with no rate are left out
+of the totals and their currencies listed under "unconverted".
+"""
+import time
+from bisect import bisect_right
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+
+from .models import FxRate, Profile
+
+ONE = Decimal("1")
+CENT = Decimal("0.01")
+DEFAULT_CURRENCY = Profile._meta.get_field("currency").default
+
+
+class MissingRate(LookupError):
+    """No rate to convert with: the rate table has nothing for the pair on or before the day."""
+
+
+def normalize(code):
+    return (code or "").strip().upper()
+
+
+def is_code(code):
+    """Shape of an ISO 4217 code, e.g. "EUR" (after `normalize`)."""
+    return len(code) == 3 and code.isalpha()
+
+
+def currency_of(user):
+    """The user's profile currency, which every aggregate is reported in."""
+    try:
+        return normalize(user.profile.currency) or DEFAULT_CURRENCY
+    except Profile.DoesNotExist:
+        return DEFAULT_CURRENCY
+
+
+def _latest(base, quote, day):
+    return (
+        FxRate.objects.filter(base=base, quote=quote, date__lte=day)
+        .order_by("-date").values_list("rate", flat=True).first()
+    )
+
+
+@lru_cache(maxsize=settings.FX_RATE_CACHE_SIZE)
+def _cached_rate(base, quote, day, generation):
+    # a miss raises rather than returning None: lru_cache doesn't keep
+    # exceptions, so rates loaded afterwards are found on the next lookup
+    direct = _latest(base, quote, day)
+    if direct is not None:
+        return direct
+    inverse = _latest(quote, base, day)
+    if inverse:
+        return ONE / inverse
+    pivot = normalize(settings.FX_PIVOT)
+    if pivot not in (base, quote):
+        return _cached_rate(base, pivot, day, generation) * _cached_rate(pivot, quote, day, generation)
+    raise MissingRate
+
+
+def _generation():
+    return int(time.monotonic() // settings.FX_RATE_CACHE_SECONDS)
+
+
+def missing(base, quote, day):
+    return MissingRate(
+        f"No {base}/{quote} exchange rate on or before {day}; load rates with manage.py load_fx_rates."
+    )
+
+
+def rate(base, quote, day):
+    """Units of `quote` per unit of `base` on `day`. Raises MissingRate."""
+    base, quote = normalize(base), normalize(quote)
+    if base == quote:
+        return ONE
+    try:
+        return _cached_rate(base, quote, day, _generation())
+    except MissingRate:
+        raise missing(base, quote, day) from None
+
+
+def clear_cache():
+    _cached_rate.cache_clear()
+
+
+def month_rate_day(month, today):
+    """The day whose rate converts a month's totals: its last day, or today while it lasts."""
+    next_first = (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return min(next_first - timedelta(days=1), today)
+
+
+def convert_rows(rows, target, today, *fields):
+    """
+    Convert `fields` of grouped rows, each with a "month" and a
+    "currency", into `target` in place: one cached rate lookup per row,
+    and none for rows already in `target`. Returns the converted rows and
+    the rows there was no rate for, which are left as they were.
+    """
+    converted, unconverted = [], []
+    for row in rows:
+        if normalize(row["currency"]) != target:
+            try:
+                factor = rate(row["currency"], target, month_rate_day(row["month"], today))
+            except MissingRate:
+                unconverted.append(row)
+                continue
+            for field in fields:
+                row[field] = (Decimal(row[field] or 0) * factor).quantize(CENT)
+        converted.append(row)
+    return converted, unconverted
+
+
+def currencies(rows):
+    """The sorted currency codes of `rows`, e.g. those convert_rows couldn't convert."""
+    return sorted({normalize(row["currency"]) for row in rows})
+
+
+def history(base, quote, until):
+    """(date, rate) pairs of the direct pair up to `until`, oldest first, for vectorized lookups."""
+    return list(
+        FxRate.objects.filter(base=base, quote=quote, date__lte=until)
+        .order_by("date").values_list("date", "rate")
+    )
+
+
+def rates_by_day(base, quote, days):
+    """
+    `rate` for each of `days` at once, as {day: rate}, leaving out the
+    days with none: the pair's history and the reverse pair's are each
+    read once (and, for the days they don't cover, the two legs through
+    FX_PIVOT), instead of a lookup per day.
+    """
+    base, quote = normalize(base), normalize(quote)
+    days = sorted(set(days))
+    if not days or base == quote:
+        return dict.fromkeys(days, ONE)
+    found = {}
+    for pair, inverse in (((base, quote), False), ((quote, base), True)):
+        pairs = history(*pair, days[-1])
+        dates = [day for day, _ in pairs]
+        for day in days:
+            index = bisect_right(dates, day) - 1
+            if day not in found and index >= 0:
+                found[day] = ONE / pairs[index][1] if inverse else pairs[index][1]
+    todo = [day for day in days if day not in found]
+    pivot = normalize(settings.FX_PIVOT)
+    if todo and pivot not in (base, quote):
+        first, second = rates_by_day(base, pivot, todo), rates_by_day(pivot, quote, todo)
+        found.update((day, first[day] * second[day]) for day in todo if day in first and day in second)
+    return found
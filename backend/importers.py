@@ -0,0 +1,281 @@
+"""
+Bank statement import: CSV, OFX and QIF parsed as a stream, validated
+row by row and written with bulk_create in fixed-size batches.
+"""
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from . import balances, fx, rollups, sync
+from .models import Category, Transaction
+from .response_cache import bump_on_commit
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+_AMOUNT_LIMIT = Decimal("100000000")          # Transaction.amount is max_digits=10, 2 places
+_DESCRIPTION_MAX = Transaction._meta.get_field("description").max_length
+_CATEGORY_MAX = Transaction._meta.get_field("category").max_length
+_CATEGORY_DEFAULT = Transaction._meta.get_field("category").default
+
+
+# ── parsers ──────────────────────────────────────────────────────────────
+# Each parser yields (line_number, {"date", "amount", "description", "category",
+# "currency"}) with raw string values; validation happens in one place below.
+# A missing currency means the importing user's profile currency.
+
+def parse_csv(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, {
+            "date":        row.get("date"),
+            "amount":      row.get("amount"),
+            "description": row.get("description") or row.get("memo") or row.get("payee"),
+            "category":    row.get("category"),
+            "currency":    row.get("currency"),
+        }
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def parse_ofx(stream):
+    """
+    Minimal OFX reader: only <STMTTRN> blocks, and the statement's
+    <CURDEF>, matter. Works for both the SGML flavour (unclosed leaf tags)
+    and OFX 2.x XML.
+    """
+    current = None
+    currency = None
+    start = 0
+    for lineno, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8", errors="replace"), 1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    yield start, {
+                        "date":        current.get("DTPOSTED", "")[:8],
+                        "amount":      current.get("TRNAMT"),
+                        "description": current.get("NAME") or current.get("MEMO"),
+                        "category":    None,
+                        "currency":    currency,
+                    }
+                    current = None
+                elif not closing:
+                    current, start = {}, lineno
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+            elif tag == "CURDEF" and not closing:
+                currency = value.strip()
+
+
+def parse_qif(stream):
+    record = {}
+    start = 1
+    for lineno, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8", errors="replace"), 1):
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == "^":
+            if record:
+                yield start, {
+                    "date":        record.get("D"),
+                    "amount":      (record.get("T") or record.get("U") or "").replace(",", ""),
+                    "description": record.get("P") or record.get("M"),
+                    "category":    record.get("L"),
+                    "currency":    None,
+                }
+            record, start = {}, lineno + 1
+        else:
+            record.setdefault(code, value)
+
+
+def _read(parser, stream):
+    """The parser's rows, with unreadable input turned into ValueError."""
+    try:
+        yield from parser(stream)
+    except UnicodeDecodeError as exc:
+        raise ValueError("The file is not UTF-8 text; export the statement as UTF-8 and try again.") from exc
+    except csv.Error as exc:
+        raise ValueError(f"The file is not valid CSV: {exc}") from exc
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+    "qfx": parse_ofx,
+    "qif": parse_qif,
+}
+
+
+def detect_format(filename, requested=None):
+    """Explicit `requested` type wins, then the file extension, then CSV."""
+    kind = requested
+    if not kind and filename and "." in filename:
+        kind = filename.rsplit(".", 1)[-1]
+    kind = (kind or "csv").lower()
+    if kind not in PARSERS:
+        raise ValueError(f"Unsupported file type '{kind}'. Use one of: {', '.join(sorted(PARSERS))}.")
+    return kind
+
+
+# ── validation ───────────────────────────────────────────────────────────
+
+_DATE_FORMATS = ("%Y-%m-%d", "%Y%m%d", "%m/%d/%Y", "%m/%d/%y", "%d.%m.%Y")
+
+
+def _parse_date(value, date_format=None):
+    value = (value or "").strip().replace("'", "/").replace(" ", "")
+    if not date_format:
+        try:
+            return date.fromisoformat(value)      # the common case, far cheaper than strptime
+        except ValueError:
+            pass
+    formats = (date_format,) if date_format else _DATE_FORMATS
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("Enter a valid date.")
+
+
+def clean_row(raw, date_format=None):
+    """Return (values, errors) for one parsed row."""
+    errors = {}
+    values = {}
+
+    try:
+        values["date"] = _parse_date(raw.get("date"), date_format)
+    except ValueError as exc:
+        errors["date"] = [str(exc)]
+
+    try:
+        amount = Decimal((raw.get("amount") or "").strip())
+        if not amount.is_finite() or abs(amount) >= _AMOUNT_LIMIT or amount.as_tuple().exponent < -2:
+            raise InvalidOperation
+        values["amount"] = amount
+    except InvalidOperation:
+        errors["amount"] = ["Enter a valid amount with at most 2 decimal places."]
+
+    description = (raw.get("description") or "").strip()
+    if len(description) > _DESCRIPTION_MAX:
+        errors["description"] = [f"Ensure this field has no more than {_DESCRIPTION_MAX} characters."]
+    values["description"] = description or None
+
+    category = (raw.get("category") or "").strip() or _CATEGORY_DEFAULT
+    if len(category) > _CATEGORY_MAX:
+        errors["category"] = [f"Ensure this field has no more than {_CATEGORY_MAX} characters."]
+    values["category"] = category
+
+    currency = raw.get("currency")
+    if currency and currency.strip():
+        currency = fx.normalize(currency)
+        if not fx.is_code(currency):
+            errors["currency"] = ["Enter a three-letter ISO 4217 currency code."]
+        values["currency"] = currency
+
+    return values, errors
+
+
+def dedupe_key(tx_date, amount, description):
+    return (tx_date, Decimal(amount).quantize(Decimal("0.01")), description or "")
+
+
+# ── import ───────────────────────────────────────────────────────────────
+
+def import_transactions(user, stream, kind="csv", dedupe=True, date_format=None, batch_size=BATCH_SIZE):
+    """
+    Import a statement for `user` in one database transaction.
+
+    Invalid rows are skipped and reported; valid rows are inserted in
+    batches of `batch_size`. With `dedupe`, rows whose (date, amount,
+    description) already exist for the user - or appeared earlier in the
+    same file - are skipped. A file that cannot be decoded or parsed at
+    all raises ValueError, and nothing is imported.
+    """
+    category_ids = dict(Category.objects.filter(user=user).values_list("name", "id"))
+    currency = fx.currency_of(user)
+    result = {"created": 0, "duplicates": 0, "error_count": 0, "errors": []}
+    deduplicator = Deduplicator(user) if dedupe else None
+    deltas = {}
+    balance_deltas = {}
+    batch = []
+
+    def flush():
+        rows = batch[:]
+        batch.clear()
+        if deduplicator:
+            rows, skipped = deduplicator.filter(rows)
+            result["duplicates"] += skipped
+        if rows:
+            Transaction.objects.bulk_create(rows, batch_size=batch_size)
+            for tx in rows:
+                rollups.add_instance(deltas, tx)
+                balances.add_instance(balance_deltas, tx)
+            result["created"] += len(rows)
+
+    with transaction.atomic():
+        seq = sync.allocate(user.pk)    # one change number for the whole import
+        for lineno, raw in _read(PARSERS[kind], stream):
+            values, errors = clean_row(raw, date_format)
+            if errors:
+                result["error_count"] += 1
+                if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                    result["errors"].append({"row": lineno, "errors": errors})
+                continue
+            values.setdefault("currency", currency)
+            batch.append(Transaction(
+                user_id=user.pk, category_fk_id=category_ids.get(values["category"]), seq=seq, **values,
+            ))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        rollups.apply(deltas)
+        balances.apply(balance_deltas)
+    if result["created"]:
+        bump_on_commit(user.pk)
+
+    return result
+
+
+class Deduplicator:
+    """
+    Remembers every (date, amount, description) key seen during one import.
+    Stored rows are loaded once per date, the first time a batch touches
+    that date; rows accepted from the file are added as they go.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.seen = set()
+        self.loaded_dates = set()
+
+    def filter(self, rows):
+        """Returns (kept_rows, skipped_count)."""
+        new_dates = {tx.date for tx in rows} - self.loaded_dates
+        if new_dates:
+            self.seen.update(
+                dedupe_key(*existing)
+                for existing in Transaction.objects
+                .filter(user=self.user, date__in=new_dates)
+                .values_list("date", "amount", "description")
+                .iterator()
+            )
+            self.loaded_dates |= new_dates
+
+        kept = []
+        for tx in rows:
+            key = dedupe_key(tx.date, tx.amount, tx.description)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            kept.append(tx)
+        return kept, len(rows) - len(kept)
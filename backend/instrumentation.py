@@ -0,0 +1,272 @@
+"""
+Per-request timing and SQL instrumentation.
+
+Every database connection gets a permanent execute_wrapper (installed on
+connection_created) that reports into the recorder of the request being
+served. The recorder lives in a ContextVar, so queries are attributed
+correctly for sync views, async views and the worker threads that
+sync_to_async hands ORM calls to. For every request the middleware:
+
+* adds a Server-Timing header (app, db, total),
+* logs requests slower than SLOW_REQUEST_THRESHOLD_MS, or issuing the
+  same SQL DUPLICATE_QUERY_THRESHOLD+ times (the N+1 signature), to the
+  "backend.slow_requests" logger,
+* feeds the in-process counters rendered by `render_metrics` for the
+  Prometheus-style /api/metrics/ endpoint. Counters are per process.
+
+A streamed (sync) response is reported when the server closes it, so the
+queries its body runs while being consumed are counted too; its
+Server-Timing header covers only the time before streaming began. Async
+streamed responses are reported when the view returns.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("backend.slow_requests")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LogFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that creates its directory on the first write, not at import."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class QueryRecorder:
+    """execute_wrapper that counts and times queries, keyed by SQL text."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            # parameters are separate from the SQL, so the text is the signature
+            self.signatures[sql] += 1
+
+    def worst_duplicate(self):
+        if not self.signatures:
+            return None, 0
+        return self.signatures.most_common(1)[0]
+
+
+class Metrics:
+    """Tiny thread-safe registry; enough for counters and one histogram."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = Counter()            # (method, route, status) -> n
+        self.duration_buckets = Counter()    # (route, le) -> n
+        self.duration_sum = Counter()        # route -> seconds
+        self.duration_count = Counter()      # route -> n
+        self.db_queries = Counter()          # route -> n
+        self.db_seconds = Counter()          # route -> seconds
+        self.duplicate_requests = Counter()  # route -> n
+        self.slow_requests = Counter()       # route -> n
+
+    def observe(self, method, route, status, seconds, recorder, slow, duplicated):
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            for le in DURATION_BUCKETS:
+                if seconds <= le:
+                    self.duration_buckets[(route, le)] += 1
+            self.duration_sum[route] += seconds
+            self.duration_count[route] += 1
+            self.db_queries[route] += recorder.count
+            self.db_seconds[route] += recorder.seconds
+            if duplicated:
+                self.duplicate_requests[route] += 1
+            if slow:
+                self.slow_requests[route] += 1
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        with self._lock:
+            family("backend_http_requests_total", "counter", "HTTP requests handled.", [
+                f'backend_http_requests_total{{method="{m}",route="{r}",status="{s}"}} {n}'
+                for (m, r, s), n in sorted(self.requests.items())
+            ])
+            samples = []
+            for route in sorted(self.duration_count):
+                for le in DURATION_BUCKETS:
+                    samples.append(
+                        f'backend_http_request_duration_seconds_bucket{{route="{route}",le="{le}"}} '
+                        f"{self.duration_buckets[(route, le)]}"
+                    )
+                samples.append(
+                    f'backend_http_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} '
+                    f"{self.duration_count[route]}"
+                )
+                samples.append(f'backend_http_request_duration_seconds_sum{{route="{route}"}} '
+                               f"{self.duration_sum[route]:.6f}")
+                samples.append(f'backend_http_request_duration_seconds_count{{route="{route}"}} '
+                               f"{self.duration_count[route]}")
+            family("backend_http_request_duration_seconds", "histogram",
+                   "Wall time per request.", samples)
+            for name, kind, help_text, values, fmt in (
+                ("backend_db_queries_total", "counter", "SQL queries issued.", self.db_queries, "{}"),
+                ("backend_db_query_seconds_total", "counter", "Time spent in SQL.", self.db_seconds, "{:.6f}"),
+                ("backend_duplicate_query_requests_total", "counter",
+                 "Requests that repeated one SQL statement past the duplicate threshold.",
+                 self.duplicate_requests, "{}"),
+                ("backend_slow_requests_total", "counter",
+                 "Requests over the slow-request threshold.", self.slow_requests, "{}"),
+            ):
+                family(name, kind, help_text, [
+                    f'{name}{{route="{route}"}} {fmt.format(value)}' for route, value in sorted(values.items())
+                ])
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+_current_recorder = ContextVar("request_query_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install(connection):
+    """Attach record_query to a connection once (see backend.signals)."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def render_metrics():
+    return metrics.render()
+
+
+class _RecordingStream:
+    """
+    A streamed response body that attributes the queries run while it is
+    consumed to the request, and reports the request when it is closed.
+    """
+
+    def __init__(self, content, recorder, on_close):
+        self._content = iter(content)
+        self._recorder = recorder
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = _current_recorder.set(self._recorder)
+        try:
+            return next(self._content)
+        finally:
+            _current_recorder.reset(token)
+
+    def close(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+class RequestInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, token, start = self._begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self._finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder, token, start = self._begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self._finish(request, response, recorder, start)
+
+    def _begin(self):
+        # connections opened before the signal receiver was wired up
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        recorder = QueryRecorder()
+        return recorder, _current_recorder.set(recorder), time.perf_counter()
+
+    def _finish(self, request, response, recorder, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.seconds * 1000
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries"',
+            f"app;dur={max(total_ms - db_ms, 0):.1f}",
+            f"total;dur={total_ms:.1f}",
+        ])
+        if response.streaming and not response.is_async:
+            response.streaming_content = _RecordingStream(
+                response.streaming_content, recorder,
+                lambda: self._observe(request, response, recorder, start),
+            )
+        else:
+            self._observe(request, response, recorder, start)
+        return response
+
+    def _observe(self, request, response, recorder, start):
+        elapsed = time.perf_counter() - start
+        total_ms = elapsed * 1000
+        db_ms = recorder.seconds * 1000
+        match = getattr(request, "resolver_match", None)
+        route = (match.url_name if match else None) or "unmatched"
+        signature, repeats = recorder.worst_duplicate()
+        duplicated = repeats >= settings.DUPLICATE_QUERY_THRESHOLD
+        slow = total_ms >= settings.SLOW_REQUEST_THRESHOLD_MS
+        metrics.observe(request.method, route, response.status_code, elapsed, recorder, slow, duplicated)
+
+        if slow or duplicated:
+            logger.warning(json.dumps({
+                "reason":     "slow" if slow else "duplicate_queries",
+                "method":     request.method,
+                "path":       request.path,
+                "route":      route,
+                "status":     response.status_code,
+                "total_ms":   round(total_ms, 1),
+                "db_ms":      round(db_ms, 1),
+                "queries":    recorder.count,
+                "duplicate":  {"count": repeats, "sql": signature} if repeats > 1 else None,
+            }))
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend.benchmarks import (
+    api_client, expect_success, make_ledger, percentile, response_cache, test_server, write_results,
+)
+from backend.response_cache import bump
+
+ENDPOINTS = {
+    "dashboard":  ("/api/dashboard/", "/api/async/dashboard/"),
+    "annual":     ("/api/analytics/annual-spending/", "/api/async/analytics/annual-spending/"),
+    "categories": ("/api/categories/summary/", "/api/async/categories/summary/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the sync (WSGI, thread per request) analytics views against their "
+        "async (ASGI) variants at the same concurrency, in process. Any non-2xx response "
+        "aborts the run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="dashboard")
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--warm", action="store_true",
+                            help="Let the response cache answer; by default every request recomputes.")
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        # Worker threads use their own connections, so the data has to be
+        # committed; it is deleted again at the end.
+        user = make_ledger("__bench_asgi__@example.com", options["rows"])
+        try:
+            auth = f"Bearer {RefreshToken.for_user(user).access_token}"
+            sync_path, async_path = ENDPOINTS[options["endpoint"]]
+            cold = not options["warm"]
+            with test_server(), response_cache():
+                results = [
+                    {"mode": "wsgi", **self._summarize(self._run_wsgi(sync_path, user, cold, options))},
+                    {"mode": "asgi", **self._summarize(self._run_asgi(async_path, auth, user, cold, options))},
+                ]
+        finally:
+            user.delete()
+
+        self.stdout.write(f"{'mode':<6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for r in results:
+            self.stdout.write(
+                f"{r['mode']:<6}{r['rps']:>9.1f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+            )
+        if options["json_path"]:
+            write_results(options["json_path"], "asgi", results, endpoint=options["endpoint"],
+                          rows=options["rows"], concurrency=options["concurrency"],
+                          requests=options["requests"], cold=cold)
+
+    def _run_wsgi(self, path, user, cold, options):
+        local = threading.local()
+
+        def one(_):
+            client = getattr(local, "client", None) or api_client(user, token=True)
+            local.client = client
+            if cold:
+                bump(user.id)
+            start = time.perf_counter()
+            response = client.get(path)
+            seconds = time.perf_counter() - start
+            expect_success(response, f"wsgi {path}")    # a failure aborts the run
+            return seconds
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            samples = list(pool.map(one, range(options["requests"])))
+        return samples, time.perf_counter() - started
+
+    def _run_asgi(self, path, auth, user, cold, options):
+        async def main():
+            client = AsyncClient()
+            queue = asyncio.Queue()
+            for n in range(options["requests"]):
+                queue.put_nowait(n)
+            samples = []
+
+            async def worker():
+                while not queue.empty():
+                    queue.get_nowait()
+                    if cold:
+                        bump(user.id)
+                    start = time.perf_counter()
+                    response = await client.get(path, headers={"Authorization": auth})
+                    samples.append(time.perf_counter() - start)
+                    expect_success(response, f"asgi {path}")
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(options["concurrency"])))
+            return samples, time.perf_counter() - started
+
+        return asyncio.run(main())
+
+    def _summarize(self, run):
+        samples, elapsed = run
+        return {
+            "requests": len(samples),
+            "rps":      len(samples) / elapsed,
+            "p50_ms":   percentile(samples, 50) * 1000,
+            "p95_ms":   percentile(samples, 95) * 1000,
+            "p99_ms":   percentile(samples, 99) * 1000,
+        }
@@ -0,0 +1,95 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend import authentication
+from backend.authentication import StatelessJWTAuthentication
+from backend.benchmarks import (
+    api_client, expect_success, make_ledger, percentile, response_cache, rolled_back, test_server, timings,
+    write_results,
+)
+
+CLASSES = [
+    ("JWTAuthentication", JWTAuthentication, False),
+    ("Stateless[cold]", StatelessJWTAuthentication, True),
+    ("Stateless[warm]", StatelessJWTAuthentication, False),
+]
+
+
+def _user_queries(queries):
+    table = connection.ops.quote_name("auth_user")
+    return sum(table in q["sql"] for q in queries)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the authentication step alone with simplejwt's JWTAuthentication and with "
+        "StatelessJWTAuthentication (cold: account state not cached; warm: cached), then count "
+        "the queries of a cached dashboard_summary request. Data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        results = []
+        with test_server(), response_cache(), rolled_back():
+            user = make_ledger("__bench_auth__@example.com", 1000)
+            header = f"Bearer {RefreshToken.for_user(user).access_token}"
+            request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=header)
+            for label, cls, cold in CLASSES:
+                results.append(self._auth(label, cls(), request, cold, options["iterations"]))
+            results.append(self._dashboard(user))
+
+        self.stdout.write(f"{'step':<22}{'p50 us':>9}{'p95 us':>9}{'queries':>9}{'user queries':>14}")
+        for r in results:
+            self.stdout.write(
+                f"{r['step']:<22}{r['p50_us']:>9.1f}{r['p95_us']:>9.1f}{r['queries']:>9}{r['user_queries']:>14}"
+            )
+        if options["json_path"]:
+            write_results(options["json_path"], "auth", results, iterations=options["iterations"])
+
+    def _auth(self, label, backend, request, cold, iterations):
+        def call():
+            if cold:
+                authentication.forget()
+            if backend.authenticate(request) is None:
+                raise CommandError(f"{label}: token rejected")
+
+        call()
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            call()
+        samples = timings(call, iterations)
+        return {
+            "step":         label,
+            "p50_us":       percentile(samples, 50) * 1e6,
+            "p95_us":       percentile(samples, 95) * 1e6,
+            "queries":      len(captured.captured_queries),
+            "user_queries": _user_queries(captured.captured_queries),
+        }
+
+    def _dashboard(self, user):
+        client = api_client(user, token=True)
+        url = reverse("dashboard_summary")
+
+        def call():
+            expect_success(client.get(url), "dashboard_summary")
+
+        call()                                      # fills the response cache
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            call()
+        samples = timings(call, 200)
+        return {
+            "step":         "dashboard_summary",
+            "p50_us":       percentile(samples, 50) * 1e6,
+            "p95_us":       percentile(samples, 95) * 1e6,
+            "queries":      len(captured.captured_queries),
+            "user_queries": _user_queries(captured.captured_queries),
+        }
@@ -0,0 +1,228 @@
+import itertools
+import tracemalloc
+from datetime import date
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend import urls
+from backend.benchmarks import SYNTHETIC_PASSWORD as PASSWORD, api_client, expect_success, make_ledger, percentile
+from backend.benchmarks import response_cache, rolled_back, test_server, timings, write_results
+from backend.models import Budget, Category, ChangeSequence, RecurringRule, Transaction
+from backend.response_cache import bump
+
+_serial = itertools.count()
+
+
+def _new_rows(ctx, n):
+    rows = Transaction.objects.bulk_create([
+        Transaction(user=ctx.user, amount=-1, date=date.today(), category="Food", description="bench")
+        for _ in range(n)
+    ])
+    return [tx.id for tx in rows]
+
+
+def _after_edit(ctx):
+    """A sync cursor from just before one transaction was saved."""
+    since = ChangeSequence.objects.filter(user=ctx.user).values_list("value", flat=True).first() or 0
+    Transaction.objects.get(pk=ctx.tx_id).save()
+    return {"data": {"since": since}}
+
+
+def _csv(ctx):
+    lines = ["date,amount,description,category"] + [
+        f"{date.today()},-{i % 50 + 1}.00,import {next(_serial)},Food" for i in range(100)
+    ]
+    return SimpleUploadedFile("statement.csv", "\n".join(lines).encode())
+
+
+# (label, URL name, method, request builder). Builders run untimed before
+# each call and return kwargs for reverse() and the client method.
+SCENARIOS = [
+    ("transaction_list[page]", "transaction_list", "get", lambda ctx: {"data": {"limit": 100}}),
+    ("transaction_list[full]", "transaction_list", "get", lambda ctx: {}),
+    ("transaction_list[search]", "transaction_list", "get",
+     lambda ctx: {"data": {"search": "coffee", "limit": 100}}),
+    ("transaction_export[csv]", "transaction_export", "get", lambda ctx: {"data": {"format": "csv"}}),
+    ("transaction_export[ndjson]", "transaction_export", "get", lambda ctx: {"data": {"format": "ndjson"}}),
+    ("transaction_export[parquet]", "transaction_export", "get", lambda ctx: {"data": {"format": "parquet"}}),
+    ("transaction_create", "transaction_list", "post",
+     lambda ctx: {"data": {"amount": "-4.50", "date": str(date.today()), "category": "Food",
+                           "description": "bench"}, "format": "json"}),
+    ("transaction_detail[put]", "transaction_detail", "put",
+     lambda ctx: {"kwargs": {"pk": ctx.tx_id},
+                  "data": {"amount": "-9.99", "date": str(date.today()), "category": "Food"},
+                  "format": "json"}),
+    ("transaction_detail[delete]", "transaction_detail", "delete",
+     lambda ctx: {"kwargs": {"pk": _new_rows(ctx, 1)[0]}}),
+    ("transaction_import", "transaction_import", "post",
+     lambda ctx: {"data": {"file": _csv(ctx)}, "format": "multipart"}),
+    ("transaction_bulk_update", "transaction_bulk_update", "patch",
+     lambda ctx: {"data": {"ids": ctx.bulk_ids, "set": {"description": "bulk"}}, "format": "json"}),
+    ("transaction_bulk_delete", "transaction_bulk_delete", "post",
+     lambda ctx: {"data": {"ids": _new_rows(ctx, 100)}, "format": "json"}),
+    ("dashboard_summary", "dashboard_summary", "get", lambda ctx: {}),
+    ("balance_timeline", "balance_timeline", "get", lambda ctx: {}),
+    ("bundle", "bundle", "get", lambda ctx: {}),
+    ("bundle[dashboard]", "bundle", "get", lambda ctx: {"data": {"include": "dashboard"}}),
+    ("sync[full]", "sync", "get", lambda ctx: {}),
+    ("sync[delta]", "sync", "get", _after_edit),
+    ("annual_spending", "annual_spending", "get", lambda ctx: {}),
+    ("analytics_trends", "analytics_trends", "get", lambda ctx: {}),
+    ("analytics_trends[week]", "analytics_trends", "get", lambda ctx: {"data": {"period": "week"}}),
+    ("budget_list", "budget_list", "get", lambda ctx: {}),
+    ("budget_status", "budget_status", "get", lambda ctx: {}),
+    ("budget_detail", "budget_detail", "put",
+     lambda ctx: {"kwargs": {"pk": ctx.budget.id},
+                  "data": {"category": ctx.budget.category_id, "amount": "250.00",
+                           "month": str(ctx.budget.month)}, "format": "json"}),
+    ("recurring_list", "recurring_list", "get", lambda ctx: {}),
+    ("recurring_create", "recurring_list", "post",
+     lambda ctx: {"data": {"amount": "-12.99", "category": "Entertainment", "frequency": "monthly",
+                           "start_date": str(date.today()), "description": "bench"}, "format": "json"}),
+    ("recurring_detail", "recurring_detail", "put",
+     lambda ctx: {"kwargs": {"pk": ctx.rule.id},
+                  "data": {"amount": "-1500.00", "category": "Utilities", "frequency": "monthly",
+                           "start_date": str(ctx.rule.start_date)}, "format": "json"}),
+    ("category_list", "category_list", "get", lambda ctx: {}),
+    ("category_detail", "category_detail", "put",
+     lambda ctx: {"kwargs": {"pk": ctx.category.id},
+                  "data": {"name": ctx.category.name, "color": "#123456", "type": ctx.category.type},
+                  "format": "json"}),
+    ("category_summary", "category_summary", "get", lambda ctx: {}),
+    ("token_obtain_pair", "token_obtain_pair", "post",
+     lambda ctx: {"data": {"username": ctx.user.username, "password": PASSWORD}, "format": "json"}),
+    ("token_refresh", "token_refresh", "post",
+     lambda ctx: {"data": {"refresh": str(RefreshToken.for_user(ctx.user))}, "format": "json"}),
+    ("token_blacklist", "token_blacklist", "post",
+     lambda ctx: {"data": {"refresh": str(RefreshToken.for_user(ctx.user))}, "format": "json"}),
+    ("register_user", "register_user", "post",
+     lambda ctx: {"data": {"email": f"bench-{next(_serial)}@example.com", "password": PASSWORD},
+                  "format": "json"}),
+    ("user_info", "user_info", "get", lambda ctx: {}),
+    ("profile", "profile", "get", lambda ctx: {}),
+    ("metrics", "metrics", "get", lambda ctx: {}),
+    ("set-password", "set-password", "post",
+     lambda ctx: {"data": {"current_password": PASSWORD, "new_password": PASSWORD}, "format": "json"}),
+]
+
+
+# URLs benchmarked elsewhere. The async views query from worker threads
+# with their own connections, which cannot see this command's rolled-back
+# data; bench_asgi load-tests them against committed data instead.
+ELSEWHERE = {
+    "async_dashboard_summary": "bench_asgi",
+    "async_annual_spending": "bench_asgi",
+    "async_category_summary": "bench_asgi",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every URL in backend/urls.py through the Django test client and report "
+        "p50/p95 latency, query count and peak Python memory. All writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000,
+                            help="Size of the throwaway ledger (ignored with --user).")
+        parser.add_argument("--user", help="Benchmark an existing seed_synthetic user instead of a "
+                                           "throwaway ledger.")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--only", action="append", help="Run only these labels (repeatable).")
+        parser.add_argument("--cold", action="store_true",
+                            help="Invalidate the response cache before every call.")
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        covered = {name for _, name, _, _ in SCENARIOS} | set(ELSEWHERE)
+        for pattern in urls.urlpatterns:
+            if pattern.name not in covered:
+                self.stderr.write(self.style.WARNING(f"No benchmark scenario for URL '{pattern.name}'."))
+
+        scenarios = [s for s in SCENARIOS if not options["only"] or s[0] in options["only"]]
+        if not scenarios:
+            raise CommandError("No scenarios selected.")
+
+        results = []
+        with test_server(), response_cache(), rolled_back():
+            ctx = self._context(options)
+            client = api_client(ctx.user, token=True)
+            for label, name, method, build in scenarios:
+                results.append(self._run(client, ctx, label, name, method, build, options))
+
+        self.stdout.write(f"{'endpoint':<28}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'peak KiB':>10}")
+        for r in results:
+            self.stdout.write(
+                f"{r['endpoint']:<28}{r['status']:>7}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+                f"{r['queries']:>9}{r['peak_kib']:>10.0f}"
+            )
+        if options["json_path"]:
+            write_results(options["json_path"], "endpoints", results,
+                          rows=options["rows"], user=options["user"],
+                          iterations=options["iterations"], cold=options["cold"])
+
+    def _context(self, options):
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user '{options['user']}'.")
+        else:
+            user = make_ledger("__bench_endpoints__@example.com", options["rows"], password=PASSWORD)
+
+        category = Category.objects.filter(user=user).first()
+        if category is None:
+            raise CommandError("The benchmark user needs at least one category.")
+        latest = Transaction.objects.filter(user=user).order_by("-date", "-id")
+        return SimpleNamespace(
+            user=user,
+            category=category,
+            budget=Budget.objects.filter(category__user=user).first()
+            or Budget.objects.create(category=category, amount=100, month=date.today().replace(day=1)),
+            tx_id=latest.values_list("id", flat=True).first() or _new_rows(SimpleNamespace(user=user), 1)[0],
+            bulk_ids=list(latest.values_list("id", flat=True)[:100]),
+            rule=RecurringRule.objects.filter(user=user).first()
+            or RecurringRule.objects.create(user=user, amount=-1500, category="Utilities",
+                                            start_date=date.today().replace(day=1)),
+        )
+
+    def _run(self, client, ctx, label, name, method, build, options):
+        def call():
+            if options["cold"]:
+                bump(ctx.user.id)
+            request = build(ctx)
+            url = reverse(name, kwargs=request.pop("kwargs", None))
+            response = expect_success(getattr(client, method)(url, **request), label)
+            if hasattr(response, "streaming_content"):
+                for _ in response.streaming_content:    # consume without holding the body
+                    pass
+            return response
+
+        call()                                      # warm-up (and first cache fill)
+
+        tracemalloc.start()
+        # the request_started signal clears queries_log mid-capture; start from empty
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx_queries:
+            response = call()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        samples = timings(call, options["iterations"])
+        return {
+            "endpoint": label,
+            "url_name": name,
+            "method":   method.upper(),
+            "status":   response.status_code,
+            "p50_ms":   percentile(samples, 50) * 1000,
+            "p95_ms":   percentile(samples, 95) * 1000,
+            "queries":  len(ctx_queries.captured_queries),
+            "peak_kib": peak / 1024,
+        }
@@ -0,0 +1,60 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import exports
+from backend.benchmarks import api_client, expect_success, make_ledger, rolled_back, test_server, write_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream /api/transactions/export/ in every format for ledgers of growing size and "
+        "report throughput and peak Python memory, which should not grow with the ledger. "
+        "Data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, action="append",
+                            help="Ledger size (repeatable); default 100000 and 500000.")
+        parser.add_argument("--format", dest="formats", choices=sorted(exports.FORMATS), action="append")
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        formats = options["formats"] or list(exports.FORMATS)
+        if "parquet" in formats and exports.pq is None:
+            raise CommandError("pyarrow is not installed; pass --format to skip parquet.")
+
+        results = []
+        for rows in options["rows"] or [100000, 500000]:
+            with test_server(), rolled_back():
+                client = api_client(make_ledger(f"__bench_export_{rows}__", rows))
+                for name in formats:
+                    seconds, size = self._export(client, name)
+                    tracemalloc.start()
+                    self._export(client, name)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    results.append({
+                        "format":   name,
+                        "rows":     rows,
+                        "rows_per_sec": rows / seconds,
+                        "mib":      size / 2 ** 20,
+                        "peak_kib": peak / 1024,
+                    })
+
+        self.stdout.write(f"{'format':<9}{'rows':>10}{'rows/s':>11}{'MiB':>9}{'peak KiB':>10}")
+        for r in results:
+            self.stdout.write(
+                f"{r['format']:<9}{r['rows']:>10}{r['rows_per_sec']:>11.0f}{r['mib']:>9.1f}{r['peak_kib']:>10.0f}"
+            )
+        if options["json_path"]:
+            write_results(options["json_path"], "export", results, formats=formats)
+
+    def _export(self, client, name):
+        start = time.perf_counter()
+        response = expect_success(client.get("/api/transactions/export/", {"format": name}), name)
+        size = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+        return time.perf_counter() - start, size
@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Sum
+from django.utils.timezone import localdate
+
+from backend import balances, recurring, rollups
+from backend.benchmarks import rolled_back, write_results
+from backend.models import DailyBalance, MonthlyRollup, RecurringRule, Transaction
+from backend.utils import default_categories
+
+# mostly monthly bills, some weekly and daily ones
+FREQUENCIES = [RecurringRule.MONTHLY] * 7 + [RecurringRule.WEEKLY] * 2 + [RecurringRule.DAILY]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time materialize_recurring over many rules and users: catching up on rules started in "
+        "the last four weeks, the next nightly run, an immediate re-run, and a run after the "
+        "rules' progress was lost (every occurrence already exists). "
+        "Checks rollups and daily balances against the ledger afterwards. Data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rules", type=int, default=100000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=recurring.BATCH_SIZE)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        today = localdate()
+        results = []
+        with rolled_back():
+            users = self._rules(rng, today, options["users"], options["rules"])
+            rules = RecurringRule.objects.filter(user_id__in=users)
+            runs = [
+                ("catch-up", today, None),
+                ("next night", today + timedelta(days=1), None),
+                ("re-run", today + timedelta(days=1), None),
+                ("progress lost", today + timedelta(days=1),
+                 lambda: rules.update(occurrences=0, next_date=F("start_date"))),
+            ]
+            for label, day, prepare in runs:
+                if prepare:
+                    prepare()
+                started = time.perf_counter()
+                result = recurring.materialize(day, batch_size=options["batch_size"])
+                seconds = time.perf_counter() - started
+                results.append({"run": label, "seconds": seconds, **result})
+            self._check(users)
+
+        self.stdout.write(f"{'run':<15}{'rules':>9}{'created':>10}{'skipped':>10}{'seconds':>9}")
+        for r in results:
+            self.stdout.write(
+                f"{r['run']:<15}{r['rules']:>9}{r['created']:>10}{r['skipped']:>10}{r['seconds']:>9.2f}"
+            )
+        if options["json_path"]:
+            write_results(options["json_path"], "recurring", results, rules=options["rules"],
+                          users=options["users"], batch_size=options["batch_size"])
+
+    def _rules(self, rng, today, user_count, rule_count):
+        User = get_user_model()
+        users = User.objects.bulk_create([
+            User(username=f"__bench_recurring_{n}__", password="!") for n in range(user_count)
+        ])
+        names = [cat["name"] for cat in default_categories()]
+        batch = []
+        for n in range(rule_count):
+            name = rng.choice(names)
+            cents = rng.randint(100000, 500000) if name == "Income" else -rng.randint(500, 200000)
+            batch.append(RecurringRule(
+                user=users[n % user_count], description=f"rule #{n}", amount=Decimal(cents) / 100,
+                category=name, frequency=rng.choice(FREQUENCIES),
+                start_date=today - timedelta(days=rng.randrange(28)),
+            ))
+            batch[-1].next_date = batch[-1].start_date
+        RecurringRule.objects.bulk_create(batch, batch_size=5000)
+        return [user.id for user in users]
+
+    def _check(self, user_ids):
+        """Rollups and closing balances must match the ledger they were maintained from."""
+        ledger = Transaction.objects.filter(user_id__in=user_ids)
+        expected = {
+            # SQLite sums as floats; round back to cents as the stored rows are
+            (row["user_id"], row["month"], row["category"], row["currency"]):
+                (row["income"].quantize(balances.CENT), row["expense"].quantize(balances.CENT), row["n"])
+            for row in rollups.grouped(ledger)
+        }
+        actual = {
+            (row.user_id, row.month, row.category, row.currency): (row.income_total, row.expense_total, row.count)
+            for row in MonthlyRollup.objects.filter(user_id__in=user_ids)
+        }
+        if actual != expected:
+            raise CommandError("MonthlyRollup does not match the ledger.")
+
+        totals = {
+            (row["user_id"], row["currency"]): row["total"].quantize(balances.CENT)
+            for row in ledger.values("user_id", "currency").annotate(total=Sum("amount")).order_by()
+        }
+        closing = {}
+        for user_id, currency, balance in (
+            DailyBalance.objects.filter(user_id__in=user_ids).order_by("user_id", "currency", "-date")
+            .values_list("user_id", "currency", "balance")
+        ):
+            closing.setdefault((user_id, currency), balance)
+        if closing != totals:
+            raise CommandError("DailyBalance closing balances do not match the ledger.")
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from backend import fastjson
+from backend.benchmarks import make_ledger, rolled_back, timings, write_results
+from backend.models import Budget, Category, Transaction
+from backend.serializers import (
+    BudgetSerializer, CategorySerializer, TransactionSerializer,
+    FastBudgetSerializer, FastCategorySerializer, FastTransactionSerializer,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the ModelSerializer + JSONRenderer path against the "
+        "values_list fast path for the list endpoints. Data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000, help="Transactions to generate.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        results = []
+        with rolled_back():
+            user = make_ledger("__bench_serializers__", options["rows"])
+            cases = [
+                ("transactions", Transaction.objects.filter(user=user).order_by("-date", "-id"),
+                 TransactionSerializer, FastTransactionSerializer),
+                ("categories", Category.objects.filter(user=user), CategorySerializer, FastCategorySerializer),
+                ("budgets", Budget.objects.filter(category__user=user), BudgetSerializer, FastBudgetSerializer),
+            ]
+            renderer = JSONRenderer()
+            for name, queryset, slow, fast in cases:
+                rows = queryset.count()
+                slow_body = renderer.render(slow(queryset, many=True).data)
+                fast_body = fastjson.dumps(fast(queryset, many=True).data)
+                if slow_body != fast_body:
+                    raise CommandError(f"{name}: fast path output differs from the serializer output")
+
+                slow_best = min(timings(lambda: renderer.render(slow(queryset.all(), many=True).data), repeat))
+                fast_best = min(timings(lambda: fastjson.dumps(fast(queryset.all(), many=True).data), repeat))
+                results.append({
+                    "endpoint":         name,
+                    "rows":             rows,
+                    "serializer_rps":   round(rows / slow_best),
+                    "fast_path_rps":    round(rows / fast_best),
+                    "speedup":          round(slow_best / fast_best, 2),
+                })
+
+        self.stdout.write(f"{'endpoint':<14}{'rows':>9}{'serializer rows/s':>20}{'fast rows/s':>14}{'speedup':>9}")
+        for r in results:
+            self.stdout.write(
+                f"{r['endpoint']:<14}{r['rows']:>9}{r['serializer_rps']:>20}{r['fast_path_rps']:>14}{r['speedup']:>8}x"
+            )
+        self.stdout.write(f"orjson: {'yes' if fastjson.orjson else 'no'}")
+        if options["json_path"]:
+            write_results(options["json_path"], "serializers", results,
+                          rows=options["rows"], repeat=repeat, orjson=fastjson.orjson is not None)
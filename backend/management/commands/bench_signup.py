@@ -0,0 +1,73 @@
+import itertools
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from backend.benchmarks import (
+    SYNTHETIC_PASSWORD as PASSWORD, api_client, expect_success, percentile, rolled_back, test_server, timings,
+    write_results,
+)
+
+# Hashes in microseconds, so the rest of the signup path can be timed on its own.
+FAST_HASHER = "django.contrib.auth.hashers.MD5PasswordHasher"
+
+
+class Command(BaseCommand):
+    help = (
+        "Register users through /api/register/ one after another and report signups/s, latency "
+        "and queries per signup, with the configured password hasher and with a trivial one "
+        "(the database path alone). Data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--signups", type=int, default=20,
+                            help="Signups with the configured hasher; 10x as many with the fast one.")
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        serial = itertools.count()
+        results = []
+        with test_server(), rolled_back():
+            results.append(self._run("configured hasher", options["signups"], serial))
+            with override_settings(PASSWORD_HASHERS=[FAST_HASHER]):
+                results.append(self._run("fast hasher", options["signups"] * 10, serial))
+
+        start = time.perf_counter()
+        make_password(PASSWORD)
+        hash_ms = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(f"{'run':<19}{'signups':>8}{'per sec':>9}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}")
+        for r in results:
+            self.stdout.write(
+                f"{r['run']:<19}{r['signups']:>8}{r['per_sec']:>9.1f}{r['p50_ms']:>9.2f}"
+                f"{r['p95_ms']:>9.2f}{r['queries']:>9}"
+            )
+        self.stdout.write(f"One password hash with the configured hasher: {hash_ms:.0f} ms.")
+        if options["json_path"]:
+            write_results(options["json_path"], "signup", results, hash_ms=hash_ms)
+
+    def _run(self, label, signups, serial):
+        client = api_client()
+        url = reverse("register_user")
+
+        def signup():
+            response = client.post(url, {"email": f"signup-{next(serial)}@example.com", "password": PASSWORD},
+                                   format="json")
+            expect_success(response, "register_user")
+
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            signup()
+        samples = timings(signup, signups)
+        return {
+            "run":     label,
+            "signups": signups,
+            "per_sec": signups / sum(samples),
+            "p50_ms":  percentile(samples, 50) * 1000,
+            "p95_ms":  percentile(samples, 95) * 1000,
+            "queries": len(captured.captured_queries),
+        }
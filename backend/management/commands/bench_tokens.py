@@ -0,0 +1,94 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from backend import tokens
+from backend.benchmarks import api_client, make_ledger, percentile, rolled_back, test_server, timings, write_results
+
+
+def _seed(user, rows, batch_size=5000):
+    """`rows` outstanding tokens, half expired, every other one blacklisted."""
+    now = aware_utcnow()
+    for start in range(0, rows, batch_size):
+        batch = OutstandingToken.objects.bulk_create([
+            OutstandingToken(
+                user=user, jti=uuid.uuid4().hex, token="x" * 200, created_at=now,
+                expires_at=now + timedelta(days=-1 if i % 2 else 7),
+            )
+            for i in range(start, min(start + batch_size, rows))
+        ])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=row) for row in batch[::2]])
+
+
+class Command(BaseCommand):
+    help = (
+        "Time /api/token/refresh/ against token tables of growing size, a replayed (blacklisted) "
+        "refresh token with and without the in-process blacklist cache, and prune_tokens "
+        "throughput. Data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, action="append",
+                            help="Outstanding tokens to seed (repeatable); default 10000 and 200000.")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        results = []
+        for rows in options["rows"] or [10000, 200000]:
+            with test_server(), rolled_back():
+                user = make_ledger(f"__bench_tokens_{rows}__@example.com", 100)
+                _seed(user, rows)
+                results.append(self._run(user, rows, options["iterations"]))
+
+        self.stdout.write(f"{'tokens':>9}{'refresh p50':>13}{'replay cold':>13}{'replay warm':>13}"
+                          f"{'pruned':>9}{'prune rows/s':>14}")
+        for r in results:
+            self.stdout.write(
+                f"{r['rows']:>9}{r['refresh_p50_ms']:>11.2f}ms{r['replay_cold_p50_ms']:>11.2f}ms"
+                f"{r['replay_warm_p50_ms']:>11.2f}ms{r['pruned']:>9}{r['prune_rows_per_sec']:>14.0f}"
+            )
+        if options["json_path"]:
+            write_results(options["json_path"], "tokens", results, iterations=options["iterations"])
+
+    def _run(self, user, rows, iterations):
+        client = api_client()
+        url = reverse("token_refresh")
+
+        # a replayed token must be a 401, not just any error
+        def refresh(token, expected=200):
+            response = client.post(url, {"refresh": str(token)}, format="json")
+            if response.status_code != expected:
+                raise CommandError(f"token_refresh: HTTP {response.status_code}, expected {expected}")
+            return response
+
+        fresh = [tokens.RefreshToken.for_user(user) for _ in range(iterations)]
+        refresh_samples = timings(lambda: refresh(fresh.pop()), iterations)
+
+        replayed = tokens.RefreshToken.for_user(user)
+        refresh(replayed)                           # rotation blacklists it
+        tokens.blacklisted.clear()
+        cold = timings(lambda: (tokens.blacklisted.clear(), refresh(replayed, 401)), iterations)
+        warm = timings(lambda: refresh(replayed, 401), iterations)
+
+        start = time.perf_counter()
+        cutoff, pruned = tokens.expired_before(), 0
+        while True:
+            outstanding, _ = tokens.prune_batch(cutoff)
+            if not outstanding:
+                break
+            pruned += outstanding
+        seconds = time.perf_counter() - start
+        return {
+            "rows":               rows,
+            "refresh_p50_ms":     percentile(refresh_samples, 50) * 1000,
+            "replay_cold_p50_ms": percentile(cold, 50) * 1000,
+            "replay_warm_p50_ms": percentile(warm, 50) * 1000,
+            "pruned":             pruned,
+            "prune_rows_per_sec": pruned / seconds if seconds else 0.0,
+        }
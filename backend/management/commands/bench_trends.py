@@ -0,0 +1,72 @@
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import localdate
+
+from backend import analytics
+from backend.benchmarks import make_ledger, rolled_back, timings, write_results
+from backend.models import Transaction
+
+
+def python_monthly(user):
+    """Per-row reference: the monthly income/expense series from model values."""
+    income, expense = defaultdict(Decimal), defaultdict(Decimal)
+    for tx_date, amount in Transaction.objects.filter(user=user).values_list("date", "amount").iterator():
+        month = tx_date.replace(day=1)
+        if amount > 0:
+            income[month] += amount
+        elif amount < 0:
+            expense[month] -= amount
+    return {month: (float(income[month]), float(expense[month])) for month in income.keys() | expense.keys()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the NumPy trends engine (load + every computation) on a large ledger "
+        "against a per-row Python pass computing only the monthly series. Data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000)
+        parser.add_argument("--years", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+
+    def handle(self, *args, **options):
+        if analytics.np is None:
+            raise CommandError("NumPy is not installed.")
+        repeat, today = options["repeat"], localdate()
+        with rolled_back():
+            started = time.perf_counter()
+            user = make_ledger("__bench_trends__", options["rows"], years=options["years"])
+            self.stdout.write(f"ledger of {options['rows']} rows built in {time.perf_counter() - started:.1f}s")
+
+            ledger = analytics.load_ledger(user)
+            reference = python_monthly(user)
+            for row in analytics.series(ledger, "month"):
+                if row["start"] in reference and (row["income"], row["expense"]) != reference[row["start"]]:
+                    raise CommandError(f"{row['start']}: NumPy series differs from the per-row reference")
+
+            steps = [
+                ("load_ledger",     lambda: analytics.load_ledger(user)),
+                ("series[day]",     lambda: analytics.series(ledger, "day")),
+                ("series[week]",    lambda: analytics.series(ledger, "week")),
+                ("series[month]",   lambda: analytics.series(ledger, "month")),
+                ("category_deltas", lambda: analytics.category_deltas(ledger, today)),
+                ("forecast",        lambda: analytics.forecast(ledger, today)),
+                ("trends (total)",  lambda: analytics.trends(user, today)),
+                ("python monthly",  lambda: python_monthly(user)),
+            ]
+            results = [
+                {"step": name, "best_ms": min(timings(fn, repeat)) * 1000}
+                for name, fn in steps
+            ]
+
+        self.stdout.write(f"{'step':<18}{'best ms':>10}")
+        for r in results:
+            self.stdout.write(f"{r['step']:<18}{r['best_ms']:>10.1f}")
+        if options["json_path"]:
+            write_results(options["json_path"], "trends", results, rows=options["rows"],
+                          years=options["years"], repeat=repeat)
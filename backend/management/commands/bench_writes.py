@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from backend import balances, database, rollups
+from backend.benchmarks import percentile, write_results
+from backend.models import Transaction
+
+PROFILES = ("development", "production")
+
+
+class Command(BaseCommand):
+    help = (
+        "Write-contention benchmark: several threads creating transactions (the "
+        "POST path: insert plus rollup and balance updates) while others read, once per "
+        "DB_PROFILE, each against a fresh SQLite file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=200, help="Writes per writer thread.")
+        parser.add_argument("--readers", type=int, default=2)
+        parser.add_argument("--profile", choices=PROFILES, action="append",
+                            help="Profile(s) to run; default both.")
+        parser.add_argument("--json", dest="json_path", help="Also write machine-readable results here.")
+        parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("bench_writes compares the SQLite profiles; unset POSTGRES_DB.")
+        if options["worker"]:
+            self.stdout.write(json.dumps(self._run(options)))
+            return
+
+        # Profiles are read from the environment when settings load, so each
+        # one runs in its own process.
+        results = []
+        for profile in options["profile"] or PROFILES:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {**os.environ, "DB_PROFILE": profile, "SQLITE_PATH": str(Path(tmp) / "bench.sqlite3")}
+                proc = subprocess.run(
+                    [sys.executable, str(settings.BASE_DIR / "manage.py"), "bench_writes", "--worker",
+                     "--writers", str(options["writers"]), "--writes", str(options["writes"]),
+                     "--readers", str(options["readers"])],
+                    env=env, capture_output=True, text=True,
+                )
+            if proc.returncode:
+                raise CommandError(f"{profile} run failed:\n{proc.stderr}")
+            results.append({"profile": profile, **json.loads(proc.stdout.strip().splitlines()[-1])})
+
+        self.stdout.write(
+            f"{'profile':<13}{'journal':>8}{'writes/s':>10}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'locked':>8}{'reads/s':>9}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r['profile']:<13}{r['journal_mode']:>8}{r['writes_per_sec']:>10.1f}"
+                f"{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['locked']:>8}{r['reads_per_sec']:>9.1f}"
+            )
+        if options["json_path"]:
+            write_results(options["json_path"], "writes", results, writers=options["writers"],
+                          writes=options["writes"], readers=options["readers"])
+
+    def _run(self, options):
+        call_command("migrate", verbosity=0)
+        user = get_user_model().objects.create_user(username="__bench_writes__", password=None)
+        journal_mode = database.pragma(connection, "journal_mode")
+        connection.close()
+
+        latencies, locked = [], []
+        reads = []
+        stop = threading.Event()
+        today = date.today()
+
+        def writer(n):
+            try:
+                for i in range(options["writes"]):
+                    start = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            tx = Transaction.objects.create(
+                                user=user, amount=Decimal("-12.50"), category="Food",
+                                date=today - timedelta(days=i % 365), description=f"writer {n} #{i}",
+                            )
+                            rollups.record(tx)
+                            balances.record(tx)
+                    except OperationalError:
+                        locked.append(1)
+                        continue
+                    latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+
+        def reader():
+            count = 0
+            try:
+                while not stop.is_set():
+                    try:
+                        list(Transaction.objects.filter(user=user).order_by("-date", "-id")[:100])
+                        count += 1
+                    except OperationalError:
+                        locked.append(1)
+            finally:
+                reads.append(count)
+                connection.close()
+
+        readers = [threading.Thread(target=reader) for _ in range(options["readers"])]
+        writers = [threading.Thread(target=writer, args=(n,)) for n in range(options["writers"])]
+        for thread in readers:
+            thread.start()
+        started = time.perf_counter()
+        for thread in writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        return {
+            "journal_mode":   journal_mode,
+            "writes":         len(latencies),
+            "locked":         len(locked),
+            "writes_per_sec": len(latencies) / elapsed,
+            "p50_ms":         percentile(latencies, 50) * 1000,
+            "p95_ms":         percentile(latencies, 95) * 1000,
+            "p99_ms":         percentile(latencies, 99) * 1000,
+            "reads_per_sec":  sum(reads) / elapsed,
+        }
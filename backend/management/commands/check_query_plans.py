@@ -0,0 +1,114 @@
+import json
+import re
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from backend.benchmarks import api_client, expect_success, test_server
+from backend.models import Budget, Category, RecurringRule, Transaction
+
+# GET endpoints whose SQL must stay on an index (URL names from backend/urls.py)
+ENDPOINTS = [
+    "transaction_list",
+    "dashboard_summary",
+    "balance_timeline",
+    "budget_list",
+    "budget_status",
+    "recurring_list",
+    "category_list",
+    "category_summary",
+    "annual_spending",
+    "bundle",
+    "sync",
+]
+
+FULL_SCAN = re.compile(r"^SCAN (backend_\w+)(?! USING)")
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+EXPLAIN = {
+    "sqlite":     "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN (FORMAT JSON) ",
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on every query issued by the hot GET endpoints and fail if any "
+        "of them full-scans a backend table (or, on SQLite, sorts in a temp B-tree)."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in EXPLAIN:
+            raise CommandError(f"check_query_plans does not understand {connection.vendor} query plans.")
+
+        problems = []
+        try:
+            with test_server(), transaction.atomic():
+                if connection.vendor == "postgresql":
+                    # the fixture is tiny, so seq scans would win on cost; with
+                    # them priced out, one only shows up where no index applies
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+                client = api_client(self._fixture_user())
+                for name in ENDPOINTS:
+                    problems += self._check(client, name)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if problems:
+            for name, detail, sql in problems:
+                self.stderr.write(f"{name}: {detail}\n    {sql}")
+            raise CommandError(f"{len(problems)} query plan regression(s) found.")
+        self.stdout.write(self.style.SUCCESS(f"{len(ENDPOINTS)} endpoints OK."))
+
+    def _fixture_user(self):
+        # A little data so the planner sees real joins; rolled back afterwards.
+        user = get_user_model().objects.create_user(username="__query_plan__", password=None)
+        food = Category.objects.create(user=user, name="Food")
+        Budget.objects.create(category=food, amount=100, month=date.today().replace(day=1))
+        Transaction.objects.create(user=user, amount=-5, date=date.today(), category="Food")
+        RecurringRule.objects.create(user=user, amount=-5, category="Food", start_date=date.today())
+        return user
+
+    def _check(self, client, name):
+        # the request_started signal clears queries_log mid-capture; start from empty
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse(name))
+            if hasattr(response, "streaming_content"):
+                b"".join(response.streaming_content)
+        # an error page's queries say nothing about the endpoint's plans
+        expect_success(response, name)
+
+        problems = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                cursor.execute(EXPLAIN[connection.vendor] + sql)
+                for detail in self._plan_problems(cursor.fetchall()):
+                    problems.append((name, detail, sql))
+        return problems
+
+    def _plan_problems(self, rows):
+        if connection.vendor == "sqlite":
+            return [row[-1] for row in rows if FULL_SCAN.match(row[-1]) or TEMP_SORT in row[-1]]
+
+        plan = rows[0][0]
+        nodes = [(json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]]
+        problems = []
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get("Plans", []))
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name", "").startswith("backend_"):
+                problems.append(f"Seq Scan on {node['Relation Name']}")
+        return problems
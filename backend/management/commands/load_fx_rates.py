@@ -0,0 +1,63 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from backend import fx
+from backend.models import FxRate
+
+COLUMNS = ("date", "base", "quote", "rate")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load exchange rates from a CSV file with the columns date,base,quote,rate (one unit of "
+        "base costs `rate` units of quote). Existing (base, quote, date) rows are overwritten. "
+        "Running servers see new rates within FX_RATE_CACHE_SECONDS (cached responses: "
+        "RESPONSE_CACHE_TIMEOUT)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        loaded = 0
+        batch = []
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as fh, transaction.atomic():
+                reader = csv.DictReader(fh)
+                missing = set(COLUMNS) - {name.strip().lower() for name in reader.fieldnames or ()}
+                if missing:
+                    raise CommandError(f"Missing column(s): {', '.join(sorted(missing))}.")
+                reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+                for row in reader:
+                    batch.append(self._rate(row, reader.line_num))
+                    if len(batch) >= options["batch_size"]:
+                        loaded += self._save(batch)
+                        batch = []
+                loaded += self._save(batch)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        fx.clear_cache()
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} exchange rates."))
+
+    def _rate(self, row, line):
+        try:
+            rate = Decimal(row["rate"].strip())
+            if not rate.is_finite() or rate <= 0:
+                raise InvalidOperation
+            base, quote = fx.normalize(row["base"]), fx.normalize(row["quote"])
+            if not (fx.is_code(base) and fx.is_code(quote)):
+                raise ValueError
+            return FxRate(date=date.fromisoformat(row["date"].strip()), base=base, quote=quote, rate=rate)
+        except (AttributeError, InvalidOperation, ValueError):
+            raise CommandError(f"Line {line}: expected YYYY-MM-DD, two currency codes and a positive rate.")
+
+    def _save(self, batch):
+        FxRate.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=["base", "quote", "date"], update_fields=["rate"],
+        )
+        return len(batch)
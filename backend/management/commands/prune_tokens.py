@@ -0,0 +1,70 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding refresh tokens and their blacklist entries, oldest first, "
+        "in short batches so it can run next to live traffic. Meant for a cron job; with "
+        "--metrics-file the counts are also written for a Prometheus textfile collector."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=tokens.PRUNE_BATCH_SIZE,
+                            help="Outstanding tokens deleted per database transaction.")
+        parser.add_argument("--sleep", type=float, default=0.0,
+                            help="Seconds to pause between batches.")
+        parser.add_argument("--max-batches", type=int,
+                            help="Stop after this many batches; the next run carries on.")
+        parser.add_argument("--metrics-file", help="Write Prometheus metrics for this run here.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        started = time.perf_counter()
+        cutoff = tokens.expired_before()
+        batches = outstanding = blacklisted = 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            pruned = tokens.prune_batch(cutoff, options["batch_size"])
+            if not pruned[0]:
+                break
+            batches += 1
+            outstanding += pruned[0]
+            blacklisted += pruned[1]
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        seconds = time.perf_counter() - started
+
+        if options["metrics_file"]:
+            self._write_metrics(options["metrics_file"], outstanding, blacklisted, batches, seconds)
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {outstanding} outstanding and {blacklisted} blacklisted tokens "
+            f"in {batches} batches, {seconds:.1f}s."
+        ))
+
+    def _write_metrics(self, path, outstanding, blacklisted, batches, seconds):
+        lines = [
+            "# HELP backend_tokens_pruned Rows deleted by the last prune_tokens run.",
+            "# TYPE backend_tokens_pruned gauge",
+            f'backend_tokens_pruned{{table="outstanding"}} {outstanding}',
+            f'backend_tokens_pruned{{table="blacklisted"}} {blacklisted}',
+            "# HELP backend_tokens_prune_batches Batches of the last prune_tokens run.",
+            "# TYPE backend_tokens_prune_batches gauge",
+            f"backend_tokens_prune_batches {batches}",
+            "# HELP backend_tokens_prune_seconds Duration of the last prune_tokens run.",
+            "# TYPE backend_tokens_prune_seconds gauge",
+            f"backend_tokens_prune_seconds {seconds:.6f}",
+            "# HELP backend_tokens_prune_last_run_timestamp_seconds When the last prune_tokens run finished.",
+            "# TYPE backend_tokens_prune_last_run_timestamp_seconds gauge",
+            f"backend_tokens_prune_last_run_timestamp_seconds {time.time():.0f}",
+        ]
+        # write then rename, so a collector never reads half a file
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "w") as fh:
+            fh.write("\n".join(lines) + "\n")
+        os.replace(partial, path)
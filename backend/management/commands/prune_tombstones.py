@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+
+from backend import sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than SYNC_TOMBSTONE_DAYS. Clients whose cursor is older "
+        "than the newest pruned tombstone get a full snapshot from /api/sync/. Meant for a cron job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SYNC_TOMBSTONE_DAYS,
+                            help="Keep tombstones this many days.")
+
+    def handle(self, *args, **options):
+        if options["days"] < 0:
+            raise CommandError("--days must not be negative.")
+        deleted = sync.prune(now() - timedelta(days=options["days"]))
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones."))
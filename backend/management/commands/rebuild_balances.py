@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from backend import balances
+
+
+class Command(BaseCommand):
+    help = "Recompute DailyBalance rows (the running balance per day) from the transaction ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only rebuild this user id (repeatable). Defaults to everyone.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = balances.rebuild(user_ids=options["users"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {created} daily balance rows."))
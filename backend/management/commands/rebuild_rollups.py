@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from backend import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute MonthlyRollup rows from the transaction ledger in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only rebuild this user id (repeatable). Defaults to everyone.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = rollups.rebuild(user_ids=options["users"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {created} rollup rows."))
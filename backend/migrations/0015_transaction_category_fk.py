@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_alter_category_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='category_fk',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='backend.category'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_category_fk(apps, schema_editor):
+    Category = apps.get_model('backend', 'Category')
+    Transaction = apps.get_model('backend', 'Transaction')
+
+    # One UPDATE ... SET category_fk_id = (SELECT ...) for the whole table
+    match = Category.objects.filter(user=OuterRef('user'), name=OuterRef('category')).values('id')[:1]
+    Transaction.objects.update(category_fk=Subquery(match))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_transaction_category_fk'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_category_fk, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Transaction = apps.get_model('backend', 'Transaction')
+    MonthlyRollup = apps.get_model('backend', 'MonthlyRollup')
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    rows = (
+        Transaction.objects
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'category')
+        .annotate(
+            income=Sum(Case(When(amount__gt=0, then=F('amount')), default=Value(Decimal(0)), output_field=money)),
+            expense=Sum(Case(When(amount__lt=0, then=-F('amount')), default=Value(Decimal(0)), output_field=money)),
+            n=Count('id'),
+        )
+        .order_by()
+    )
+    MonthlyRollup.objects.bulk_create(
+        [
+            MonthlyRollup(user_id=r['user_id'], month=r['month'], category=r['category'],
+                          income_total=r['income'], expense_total=r['expense'], count=r['n'])
+            for r in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from backend import search
+
+
+def install_fts(apps, schema_editor):
+    search.install(schema_editor.connection)
+
+
+def uninstall_fts(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0019_backfill_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fts, uninstall_fts),
+    ]
@@ -0,0 +1,84 @@
+"""
+PostgreSQL only: turn backend_transaction into a table hash-partitioned
+by user_id. Every query the API issues filters on one user, so the
+planner prunes to a single partition and each partition's indexes stay
+small. Hash rather than date ranges, so there are no partitions to
+create as time passes.
+
+A partitioned table's primary key has to include the partition key, so
+the key becomes (id, user_id); id stays unique through its sequence.
+Identity columns on partitioned tables need PostgreSQL 17, so id uses a
+plain sequence default instead. Other databases skip this migration.
+"""
+from django.conf import settings
+from django.db import migrations
+
+PARTITIONS = 16
+TABLE = "backend_transaction"
+
+
+def _keys_and_indexes(apps, schema_editor, primary_key):
+    Transaction = apps.get_model("backend", "Transaction")
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    execute = schema_editor.execute
+    execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY ({primary_key})")
+    execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_user_id_fk FOREIGN KEY (user_id) "
+        f"REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_category_fk_id_fk FOREIGN KEY (category_fk_id) "
+        f"REFERENCES backend_category (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    execute(f"CREATE INDEX {TABLE}_user_id_idx ON {TABLE} (user_id)")
+    execute(f"CREATE INDEX {TABLE}_category_fk_id_idx ON {TABLE} (category_fk_id)")
+    for index in Transaction._meta.indexes:
+        schema_editor.add_index(Transaction, index)
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+    execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_plain")
+    execute(f"CREATE TABLE {TABLE} (LIKE {TABLE}_plain INCLUDING DEFAULTS) PARTITION BY HASH (user_id)")
+    # after a reverse migration id's copied default uses the old table's
+    # sequence, which goes with that table; a new one is attached below
+    execute(f"ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT")
+    for n in range(PARTITIONS):
+        execute(
+            f"CREATE TABLE {TABLE}_p{n} PARTITION OF {TABLE} "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {n})"
+        )
+    execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_plain")
+    execute(f"DROP TABLE {TABLE}_plain")      # takes its identity sequence with it
+
+    execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    execute(f"SELECT setval('{TABLE}_id_seq', COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)")
+    execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+    _keys_and_indexes(apps, schema_editor, "id, user_id")
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+    execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned")
+    execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY NONE")
+    execute(f"CREATE TABLE {TABLE} (LIKE {TABLE}_partitioned INCLUDING DEFAULTS)")
+    execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned")
+    execute(f"DROP TABLE {TABLE}_partitioned")
+    execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    _keys_and_indexes(apps, schema_editor, "id")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0020_transaction_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# PostgreSQL only: a BRIN index on date costs a few pages per partition and
+# serves date-range scans across users (rollup rebuilds, batch jobs), since
+# rows are mostly appended in date order.
+def create_date_brin(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE INDEX tx_date_brin ON backend_transaction USING brin (date)")
+
+
+def drop_date_brin(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS tx_date_brin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0021_partition_transactions_postgres'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('amount__lt', 0)), fields=['user', 'date'], name='tx_expense_user_date_idx'),
+        ),
+        migrations.RunPython(create_date_brin, drop_date_brin),
+    ]
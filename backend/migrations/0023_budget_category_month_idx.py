@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0022_transaction_expense_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['category', 'month'], name='budget_cat_month_idx'),
+        ),
+    ]
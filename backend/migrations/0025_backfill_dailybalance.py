@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill_balances(apps, schema_editor):
+    Transaction = apps.get_model('backend', 'Transaction')
+    DailyBalance = apps.get_model('backend', 'DailyBalance')
+
+    rows = (
+        Transaction.objects
+        .values('user_id', 'date')
+        .annotate(total=Sum('amount'), n=Count('id'))
+        .order_by('user_id', 'date')
+    )
+    batch = []
+    user_id, balance = None, Decimal(0)
+    for r in rows.iterator():
+        if r['user_id'] != user_id:
+            user_id, balance = r['user_id'], Decimal(0)
+        total = r['total'].quantize(Decimal('0.01'))    # SQLite sums as floats
+        balance += total
+        batch.append(DailyBalance(user_id=user_id, date=r['date'], delta=total,
+                                  balance=balance, count=r['n']))
+        if len(batch) >= 1000:
+            DailyBalance.objects.bulk_create(batch)
+            batch = []
+    DailyBalance.objects.bulk_create(batch)
+
+
+def clear_balances(apps, schema_editor):
+    apps.get_model('backend', 'DailyBalance').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0024_dailybalance'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_balances, clear_balances),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0026_recurringrule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='monthlyrollup',
+            name='currency',
+            field=models.CharField(default='USD', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='recurringrule',
+            name='currency',
+            field=models.CharField(default='USD', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default='USD', max_length=10),
+        ),
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together={('user', 'month', 'category', 'currency')},
+        ),
+        migrations.CreateModel(
+            name='FxRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('base', models.CharField(max_length=10)),
+                ('quote', models.CharField(max_length=10)),
+                ('rate', models.DecimalField(decimal_places=10, max_digits=20)),
+            ],
+            options={
+                'unique_together': {('base', 'quote', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Upper
+
+# Rows written before amounts had a currency were entered in the owner's
+# profile currency.
+MODELS = ('Transaction', 'RecurringRule', 'MonthlyRollup')
+
+
+def backfill_currency(apps, schema_editor):
+    Profile = apps.get_model('backend', 'Profile')
+    currency = Subquery(
+        Profile.objects.filter(user_id=OuterRef('user_id')).annotate(code=Upper('currency')).values('code')[:1]
+    )
+    others = Profile.objects.exclude(currency='USD').values('user_id')
+    for name in MODELS:
+        apps.get_model('backend', name).objects.filter(user_id__in=others).update(currency=currency)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0027_currency'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_currency, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+# prune_tokens deletes outstanding tokens by expiry; simplejwt does not
+# index expires_at, so every batch would scan the whole table.
+def create_expires_index(apps, schema_editor):
+    schema_editor.execute(
+        "CREATE INDEX outstandingtoken_expires_idx ON token_blacklist_outstandingtoken (expires_at)"
+    )
+
+
+def drop_expires_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS outstandingtoken_expires_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0028_backfill_currency'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_expires_index, drop_expires_index),
+    ]
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import migrations
+
+
+# Registration looks users up by email, which auth_user does not index.
+def create_email_index(apps, schema_editor):
+    table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    schema_editor.execute(f"CREATE INDEX user_email_idx ON {schema_editor.quote_name(table)} (email)")
+
+
+def drop_email_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS user_email_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0029_outstandingtoken_expires_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0031_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='dailybalance',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='dailybalance',
+            name='currency',
+            field=models.CharField(default='USD', max_length=10),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailybalance',
+            unique_together={('user', 'currency', 'date')},
+        ),
+    ]
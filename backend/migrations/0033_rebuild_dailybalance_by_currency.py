@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+# Rows written before balances were kept per currency summed every
+# currency together; recompute them from the ledger.
+
+
+def _rebuild(apps, by_currency):
+    Transaction = apps.get_model('backend', 'Transaction')
+    DailyBalance = apps.get_model('backend', 'DailyBalance')
+    DailyBalance.objects.all().delete()
+
+    group = ['user_id', 'currency'] if by_currency else ['user_id']
+    rows = (
+        Transaction.objects
+        .values(*group, 'date')
+        .annotate(total=Sum('amount'), n=Count('id'))
+        .order_by(*group, 'date')
+    )
+    batch = []
+    ledger, balance = None, Decimal(0)
+    for r in rows.iterator():
+        key = tuple(r[name] for name in group)
+        if key != ledger:
+            ledger, balance = key, Decimal(0)
+        total = r['total'].quantize(Decimal('0.01'))    # SQLite sums as floats
+        balance += total
+        batch.append(DailyBalance(user_id=r['user_id'], currency=r.get('currency', 'USD'), date=r['date'],
+                                  delta=total, balance=balance, count=r['n']))
+        if len(batch) >= 1000:
+            DailyBalance.objects.bulk_create(batch)
+            batch = []
+    DailyBalance.objects.bulk_create(batch)
+
+
+def by_currency(apps, schema_editor):
+    _rebuild(apps, by_currency=True)
+
+
+def across_currencies(apps, schema_editor):
+    _rebuild(apps, by_currency=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0032_dailybalance_currency'),
+    ]
+
+    operations = [
+        migrations.RunPython(by_currency, across_currencies),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.validators import MinValueValidator
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 from django.conf import settings
@@ -16,9 +17,13 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     color = models.CharField(max_length=7, default='#000000')
     type = models.CharField(max_length=10, choices=[('expense', 'Expense'), ('income', 'Income')], default='expense')
+    seq = models.BigIntegerField(default=0, editable=False)  # last change; see backend.sync
 
     class Meta:
         unique_together = ("user", "name")   # each user can reuse names freely
+        indexes = [
+            models.Index(fields=["user", "seq"], name="category_user_seq_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -28,7 +33,49 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     date = models.DateField()
     category = models.CharField(max_length=100, default="N/A")  # ← Must be here
+    currency = models.CharField(max_length=10, default='USD')  # the amount's; see backend.fx
+    # Resolved from `category` on save so reports can join instead of
+    # matching on the free-text name.
+    category_fk = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name="transactions")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Set on occurrences created by materialize_recurring; kept if the rule goes.
+    recurring_rule = models.ForeignKey("RecurringRule", on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name="transactions")
+    seq = models.BigIntegerField(default=0, editable=False)  # last change; see backend.sync
+
+    class Meta:
+        constraints = [
+            # one transaction per occurrence, so materializing is idempotent;
+            # user is in the key because PostgreSQL partitions this table on it
+            models.UniqueConstraint(fields=["user", "recurring_rule", "date"],
+                                    condition=models.Q(recurring_rule__isnull=False),
+                                    name="tx_recurring_occurrence_uniq"),
+        ]
+        indexes = [
+            # per-user date ranges and the ('-date', '-id') list ordering
+            models.Index(fields=["user", "date"], name="tx_user_date_idx"),
+            models.Index(fields=["user", "category", "date"], name="tx_user_cat_date_idx"),
+            # type=expense listings and expense totals (amount < 0)
+            models.Index(fields=["user", "date"], condition=models.Q(amount__lt=0),
+                         name="tx_expense_user_date_idx"),
+            # changes since a sync cursor
+            models.Index(fields=["user", "seq"], name="tx_user_seq_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_category = instance.__dict__.get("category")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Only a new row or a changed name needs resolving: rows already
+        # stored are linked when a category of their name is created.
+        if self.category != getattr(self, "_saved_category", None):
+            self.category_fk = Category.objects.filter(user_id=self.user_id, name=self.category).first()
+        super().save(*args, **kwargs)
+        self._saved_category = self.category
 
     def __str__(self):
         return f"{self.title} - ${self.amount}"
@@ -38,6 +85,141 @@ class Budget(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     month = models.DateField()  # just use the first day of the month for reference
+    seq = models.BigIntegerField(default=0, editable=False)  # last change; see backend.sync
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["month"], name="budget_month_idx"),
+            # one user's budgets for a month: categories by user, then this
+            models.Index(fields=["category", "month"], name="budget_cat_month_idx"),
+            models.Index(fields=["category", "seq"], name="budget_cat_seq_idx"),
+        ]
     
     def __str__(self):
         return f"{self.category} - {self.month.strftime('%B %Y')}"
+
+
+class MonthlyRollup(models.Model):
+    """Per-user, per-month, per-category totals kept in step by backend.rollups."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="monthly_rollups")
+    month = models.DateField()  # first day of the month, like Budget.month
+    category = models.CharField(max_length=100)
+    currency = models.CharField(max_length=10, default="USD")  # of the totals, unconverted
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # absolute value
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "month", "category", "currency")
+
+    def __str__(self):
+        return f"{self.user} {self.month.strftime('%B %Y')} {self.category}"
+
+
+class DailyBalance(models.Model):
+    """
+    One row per user, currency and day with transactions in it: that
+    day's net change and the closing balance after it, in that currency.
+    Kept in step by backend.balances.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_balances")
+    currency = models.CharField(max_length=10, default="USD")  # of the amounts, unconverted
+    date = models.DateField()
+    delta = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        # in this order so one currency's days are a range of the index
+        unique_together = ("user", "currency", "date")
+
+    def __str__(self):
+        return f"{self.user} {self.date} {self.balance} {self.currency}"
+
+
+class RecurringRule(models.Model):
+    """
+    A repeating transaction (rent, salary, a subscription), after the RFC
+    5545 RRULE: every `interval` days/weeks/months/years from `start_date`
+    (DTSTART), ending at `until` or after `count` occurrences (UNTIL,
+    COUNT). backend.recurring turns due occurrences into Transactions;
+    `occurrences` and `next_date` record how far it has got.
+    """
+    DAILY, WEEKLY, MONTHLY, YEARLY = "daily", "weekly", "monthly", "yearly"
+    FREQUENCIES = [(DAILY, "Daily"), (WEEKLY, "Weekly"), (MONTHLY, "Monthly"), (YEARLY, "Yearly")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recurring_rules")
+    description = models.CharField(max_length=255, blank=True, null=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.CharField(max_length=100, default="N/A")
+    currency = models.CharField(max_length=10, default="USD")
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default=MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    start_date = models.DateField()
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+    occurrences = models.PositiveIntegerField(default=0)   # materialized so far
+    next_date = models.DateField(null=True, blank=True)    # None once the rule has ended
+
+    class Meta:
+        indexes = [
+            # the worker's scan for due rules
+            models.Index(fields=["next_date"], name="recurring_next_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.description or self.category} ({self.get_frequency_display()})"
+
+
+class FxRate(models.Model):
+    """
+    One unit of `base` costs `rate` units of `quote` on `date`. Loaded from
+    CSV with manage.py load_fx_rates; read through backend.fx.
+    """
+    date = models.DateField()
+    base = models.CharField(max_length=10)
+    quote = models.CharField(max_length=10)
+    rate = models.DecimalField(max_digits=20, decimal_places=10)
+
+    class Meta:
+        # also the index for "latest rate on or before a day"
+        unique_together = ("base", "quote", "date")
+
+    def __str__(self):
+        return f"{self.date} {self.base}/{self.quote} {self.rate}"
+
+
+class ChangeSequence(models.Model):
+    """
+    A user's change counter for incremental sync: the last number handed
+    to a write of their transactions, categories or budgets (backend.sync).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name="change_sequence")
+    value = models.BigIntegerField(default=0)
+    # tombstones numbered up to this were pruned; older cursors resync in full
+    pruned_through = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} at {self.value}"
+
+
+class Tombstone(models.Model):
+    """A deleted transaction, category or budget, kept so syncing clients can drop it too."""
+    TRANSACTION, CATEGORY, BUDGET = "transaction", "category", "budget"
+    KINDS = [(TRANSACTION, "Transaction"), (CATEGORY, "Category"), (BUDGET, "Budget")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tombstones")
+    kind = models.CharField(max_length=12, choices=KINDS)
+    object_id = models.BigIntegerField()
+    seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "seq"], name="tombstone_user_seq_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.seq}"
@@ -0,0 +1,107 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+
+from .fastjson import dumps
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+
+
+def encode_cursor(row_date, row_id):
+    """Opaque cursor for the (date, id) position of the last row on a page."""
+    if isinstance(row_date, date):
+        row_date = row_date.isoformat()
+    raw = f"{row_date}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError on anything malformed."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        row_date, row_id = raw.split("|")
+        return date.fromisoformat(row_date), int(row_id)
+    except (UnicodeError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("limit must be an integer") from exc
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def after_cursor(queryset, cursor):
+    """
+    Keyset filter for a queryset ordered by ('-date', '-id'): keep only
+    the rows that sort strictly after the cursor position.
+    """
+    row_date, row_id = decode_cursor(cursor)
+    return queryset.filter(Q(date__lt=row_date) | Q(date=row_date, id__lt=row_id))
+
+
+def paginate(queryset, serializer_class, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of a ('-date', '-id') ordered queryset.
+
+    Returns {"results": [...], "next": <cursor or None>}; fetching limit + 1
+    rows tells us whether there is another page without a COUNT(*).
+    `serializer_class` may be a ModelSerializer or a fastjson ValuesSerializer.
+    """
+    if cursor:
+        queryset = after_cursor(queryset, cursor)
+    results = serializer_class(queryset[:limit + 1], many=True).data
+    has_more = len(results) > limit
+    results = results[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = results[-1]
+        next_cursor = encode_cursor(last["date"], last["id"])
+
+    return {
+        "results": results,
+        "next":    next_cursor,
+    }
+
+
+def _chunks(queryset, chunk_size):
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_json_array(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield the queryset as one JSON array, serialized chunk by chunk so only
+    `chunk_size` model instances are alive at a time. Encoded like the
+    unstreamed list (fastjson.dumps), so both modes return the same bytes.
+    """
+    yield b"["
+    first = True
+    for chunk in _chunks(queryset, chunk_size):
+        encoded = b",".join(dumps(item) for item in serializer_class(chunk, many=True).data)
+        yield encoded if first else b"," + encoded
+        first = False
+    yield b"]"
+
+
+def stream_ndjson(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE):
+    """Same as stream_json_array, one JSON object per line."""
+    for chunk in _chunks(queryset, chunk_size):
+        yield b"".join(dumps(item) + b"\n" for item in serializer_class(chunk, many=True).data)
@@ -0,0 +1,137 @@
+"""
+Recurring transactions: the occurrence dates of a RecurringRule and the
+worker that materializes the due ones.
+
+Occurrence n is computed from start_date directly, never from occurrence
+n-1, so a monthly rule on the 31st falls on the last day of shorter
+months and returns to the 31st afterwards. (RFC 5545 skips such months;
+for rent and salaries the month end is what people mean.)
+
+`materialize` walks the due rules in (user, id) order, `batch_size` at a time,
+one database transaction per batch: occurrences go in with bulk_create,
+rollups and daily balances through their bulk paths, and the rules'
+progress with bulk_update. Every occurrence carries its rule and
+(user, rule, date) is unique, so re-running - after a crash, or after a
+rule's schedule was edited - never inserts an occurrence twice.
+"""
+import calendar
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import balances, database, rollups, sync
+from .models import Category, RecurringRule, Transaction
+from .response_cache import bump_on_commit
+
+BATCH_SIZE = 1000
+# A rule far behind (a daily rule started years ago) catches up over
+# several runs rather than flooding one batch.
+MAX_PER_RULE = 366
+
+SCHEDULE_FIELDS = ("frequency", "interval", "start_date")
+
+
+def add_months(day, months):
+    """`day` moved by `months`, clamped to the end of shorter months."""
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence(rule, n):
+    """Date of occurrence `n` (from 0), or None past the calendar's end."""
+    step = rule.interval * n
+    try:
+        if rule.frequency == RecurringRule.DAILY:
+            return rule.start_date + timedelta(days=step)
+        if rule.frequency == RecurringRule.WEEKLY:
+            return rule.start_date + timedelta(weeks=step)
+        if rule.frequency == RecurringRule.MONTHLY:
+            return add_months(rule.start_date, step)
+        return add_months(rule.start_date, 12 * step)
+    except (OverflowError, ValueError):
+        return None
+
+
+def schedule(rule):
+    """Set `next_date` from `occurrences`, `until` and `count`; None once the rule has ended."""
+    day = None
+    if rule.count is None or rule.occurrences < rule.count:
+        day = occurrence(rule, rule.occurrences)
+        if day is not None and rule.until is not None and day > rule.until:
+            day = None
+    rule.next_date = day
+    return rule
+
+
+def due(rule, today, limit=MAX_PER_RULE):
+    """Dates of the rule's occurrences up to `today`, advancing the rule past them."""
+    dates = []
+    while rule.next_date is not None and rule.next_date <= today and len(dates) < limit:
+        dates.append(rule.next_date)
+        rule.occurrences += 1
+        schedule(rule)
+    return dates
+
+
+def materialize(today, batch_size=BATCH_SIZE, limit=MAX_PER_RULE):
+    """Create every occurrence due by `today`. Returns counts of rules, created and skipped rows."""
+    result = {"rules": 0, "created": 0, "skipped": 0}
+    # In (user, id) order, so a user's rules share as few batches as
+    # possible and their balances and rollups are rewritten once, not
+    # once per batch.
+    due_rules = RecurringRule.objects.filter(next_date__lte=today).order_by("user_id", "id")
+    after = Q()
+    while True:
+        with transaction.atomic():
+            # skip_locked: concurrent workers split the rules between them
+            rules = list(due_rules.filter(after).select_for_update(skip_locked=True)[:batch_size])
+            if not rules:
+                break
+            last = rules[-1]
+            after = Q(user_id__gt=last.user_id) | Q(user_id=last.user_id, id__gt=last.id)
+            created, skipped = _materialize_batch(rules, today, limit)
+        for user_id in {tx.user_id for tx in created}:
+            bump_on_commit(user_id)
+        result["rules"] += len(rules)
+        result["created"] += len(created)
+        result["skipped"] += skipped
+    return result
+
+
+def _materialize_batch(rules, today, limit):
+    pending = [(rule, day) for rule in rules for day in due(rule, today, limit)]
+    # occurrences already there (an earlier, interrupted run) are skipped
+    existing = set(
+        Transaction.objects
+        .filter(recurring_rule__in=[rule.id for rule in rules], date__gte=min(day for _, day in pending))
+        .values_list("recurring_rule_id", "date")
+    )
+    category_ids = {
+        (user_id, name): pk
+        for user_id, name, pk in Category.objects.filter(
+            user_id__in={rule.user_id for rule in rules}, name__in={rule.category for rule in rules},
+        ).values_list("user_id", "name", "id")
+    }
+    created = [
+        Transaction(
+            user_id=rule.user_id, recurring_rule_id=rule.id, date=day,
+            amount=rule.amount, currency=rule.currency, description=rule.description, category=rule.category,
+            category_fk_id=category_ids.get((rule.user_id, rule.category)),
+        )
+        for rule, day in pending
+        if (rule.id, day) not in existing
+    ]
+    seqs = {user_id: sync.allocate(user_id) for user_id in sorted({tx.user_id for tx in created})}
+    for tx in created:
+        tx.seq = seqs[tx.user_id]
+    Transaction.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    deltas, balance_deltas = {}, {}
+    for tx in created:
+        rollups.add_instance(deltas, tx)
+        balances.add_instance(balance_deltas, tx)
+    rollups.apply(deltas)
+    balances.apply(balance_deltas)
+    database.bulk_update(rules, ["occurrences", "next_date"])
+    return created, len(pending) - len(created)
@@ -0,0 +1,303 @@
+"""
+The queries behind the analytics endpoints, one function per figure, so
+the DRF views and their async variants compute exactly the same thing.
+Money is reported in the user's profile currency: MonthlyRollup is
+grouped by (month, currency) in the database and each group converted
+with backend.fx. Groups with no exchange rate are left out of the
+figures, and their currencies listed under "unconverted".
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.utils.timezone import localdate
+
+from . import fx
+from .models import Budget, Category, MonthlyRollup, Transaction
+from .serializers import FastBudgetSerializer, TransactionSerializer
+
+CENT = Decimal("0.01")
+
+
+def _rollup_rows(user, by_category=False, **filters):
+    """MonthlyRollup totals per (month, currency[, category]) matching `filters`, unconverted."""
+    group = ["month", "currency"] + (["category"] if by_category else [])
+    return list(
+        MonthlyRollup.objects
+        .filter(user=user, **filters)
+        .values(*group)
+        .annotate(income=Sum("income_total"), expense=Sum("expense_total"))
+        .order_by()
+    )
+
+
+def _converted(rows, user, today):
+    """The converted rows and the ones left out for want of a rate; see fx.convert_rows."""
+    return fx.convert_rows(rows, fx.currency_of(user), today, "income", "expense")
+
+
+def _skipped(rows, key):
+    """The currencies of unconverted `rows`, grouped by key(row)."""
+    skipped = {}
+    for row in rows:
+        skipped.setdefault(key(row), set()).add(fx.normalize(row["currency"]))
+    return {group: sorted(codes) for group, codes in skipped.items()}
+
+
+def _monthly_totals(user, today, by_category=False, **filters):
+    """`_rollup_rows`, converted (see `_converted`)."""
+    return _converted(_rollup_rows(user, by_category, **filters), user, today)
+
+
+def _regroup(rows, *keys):
+    """Income and expense of `rows` summed per `keys`, as grouping by them in the database would."""
+    groups = {}
+    for row in rows:
+        key = tuple(row[name] for name in keys)
+        if key not in groups:
+            groups[key] = dict(zip(keys, key), income=0, expense=0)
+        groups[key]["income"] += row["income"] or 0
+        groups[key]["expense"] += row["expense"] or 0
+    return list(groups.values())
+
+
+def _expense(rows):
+    return sum((Decimal(row["expense"] or 0) for row in rows), Decimal(0)).quantize(CENT)
+
+
+def spending(user, current):
+    """
+    This month's and this year's expense, from one scan of the year's
+    rollups, and the currencies left out of them for want of a rate.
+    """
+    months, unconverted = _monthly_totals(user, current.date(), month__year=current.year)
+    first = current.date().replace(day=1)
+    return _expense(row for row in months if row["month"] == first), _expense(months), fx.currencies(unconverted)
+
+
+def month_bounds(day):
+    """First day of `day`'s month and of the month after it."""
+    first = day.replace(day=1)
+    return first, (first + timedelta(days=32)).replace(day=1)
+
+
+def parse_month(value, default):
+    """YYYY-MM or YYYY-MM-DD; ValueError if malformed."""
+    if value in (None, ""):
+        return default
+    try:
+        return date.fromisoformat(value + "-01" if len(value) == 7 else value)
+    except ValueError as exc:
+        raise ValueError("month must be YYYY-MM") from exc
+
+
+def monthly_budget(user, current):
+    # Total of the user's budgets for the current month; a range on month
+    # (not __month) so budget_cat_month_idx applies
+    first, next_first = month_bounds(current.date())
+    return Budget.objects.filter(
+        category__user=user,
+        month__gte=first,
+        month__lt=next_first,
+    ).aggregate(total=Sum('amount'))['total'] or 0
+
+
+def recent_transactions(user, limit=5):
+    recent = Transaction.objects.filter(user=user).order_by('-date')[:limit]
+    return TransactionSerializer(recent, many=True).data
+
+
+def dashboard(monthly, budget, yearly, recent, unconverted=()):
+    return {
+        'monthlySpending': abs(monthly),
+        'monthlyBudget': budget,
+        'yearlySpending': abs(yearly),
+        'recentTransactions': recent,
+        'unconverted': list(unconverted),
+    }
+
+
+def annual_spending(user):
+    # MonthlyRollup holds at most 12 rows per category and currency per year
+    return _annual(*_monthly_totals(user, localdate()))
+
+
+def _annual(months, unconverted=()):
+    skipped = _skipped(unconverted, lambda row: row["month"].year)
+    years = dict.fromkeys(skipped, (0, 0))     # a year of nothing but unconverted rows still shows
+    for row in months:
+        income, expense = years.get(row["month"].year, (0, 0))
+        years[row["month"].year] = (income + Decimal(row["income"] or 0), expense + Decimal(row["expense"] or 0))
+
+    return [
+        {
+            "year":        year,
+            "income":      float(Decimal(income).quantize(CENT)),
+            "expense":     float(Decimal(expense).quantize(CENT)),
+            "unconverted": skipped.get(year, []),
+        }
+        for year, (income, expense) in sorted(years.items())
+    ]
+
+
+def category_summary(user):
+    # Per-category net from MonthlyRollup (converted per month and
+    # currency), instead of summing the ledger
+    return _category_summary(
+        *_monthly_totals(user, localdate(), by_category=True),
+        categories=Category.objects.filter(user=user).values("id", "name", "type", "color"),
+    )
+
+
+def _category_summary(rows, unconverted, categories):
+    skipped = _skipped(unconverted, lambda row: row["category"])
+    totals = {}
+    for row in rows:
+        net = Decimal(row["income"] or 0) - Decimal(row["expense"] or 0)
+        totals[row["category"]] = totals.get(row["category"], 0) + net
+
+    response_data = []
+    for cat in categories:
+        total = Decimal(totals.get(cat["name"], 0)).quantize(CENT)
+
+        if cat["type"] == "income":
+            response_data.append({
+                "id":           cat["id"],
+                "name":         cat["name"],
+                "type":         cat["type"],
+                "color":        cat["color"],
+                "total_earned": max(total, 0),
+                "unconverted":  skipped.get(cat["name"], []),
+            })
+        else:
+            response_data.append({
+                "id":           cat["id"],
+                "name":         cat["name"],
+                "type":         cat["type"],
+                "color":        cat["color"],
+                "total_spent":  abs(min(total, 0)),
+                "unconverted":  skipped.get(cat["name"], []),
+            })
+    return response_data
+
+
+def budget_status(user, month, today):
+    """
+    Limit, spend, remaining and burn rate of each of the user's budgets in
+    `month`. Two queries: the month's MonthlyRollup rows per category and
+    currency (a range of the rollup's unique key), converted, and the
+    budgets; the cost doesn't grow with the size of the ledger.
+
+    burn_rate is the share of the budget spent divided by the share of the
+    month gone: above 1 means spending faster than the budget allows.
+    """
+    first, _ = month_bounds(month)
+    return _budget_status(*_monthly_totals(user, today, month=first, by_category=True), user, month, today)
+
+
+def _budget_status(rows, unconverted, user, month, today):
+    """budget_status from per-category rollup rows of any months, converted and not."""
+    first, next_first = month_bounds(month)
+    days = (next_first - first).days
+    elapsed = min(max((today - first).days + 1, 0), days)
+
+    spent = {}
+    for row in rows:
+        if row["month"] == first:
+            spent[row["category"]] = spent.get(row["category"], 0) + Decimal(row["expense"] or 0)
+    rows = (
+        Budget.objects
+        .filter(category__user=user, month__gte=first, month__lt=next_first)
+        .values("id", "category_id", "category__name", "category__color", "amount")
+        .order_by("category__name", "id")
+    )
+
+    budgets = []
+    for row in rows:
+        limit, spent_total = row["amount"], Decimal(spent.get(row["category__name"], 0)).quantize(CENT)
+        used = spent_total / limit if limit else None
+        budgets.append({
+            "id":              row["id"],
+            "category":        row["category_id"],
+            "category_name":   row["category__name"],
+            "color":           row["category__color"],
+            "limit":           limit,
+            "spent":           spent_total,
+            "remaining":       limit - spent_total,
+            "pct_used":        round(float(used) * 100, 1) if used is not None else None,
+            "burn_rate":       round(float(used) * days / elapsed, 2) if used is not None and elapsed else None,
+            "projected_spend": (spent_total * days / elapsed).quantize(CENT) if elapsed else spent_total,
+            "over_budget":     spent_total > limit,
+        })
+
+    # a category with two budgets still spent its money once
+    spent_by_category = {b["category"]: b["spent"] for b in budgets}
+    limit_total = sum((b["limit"] for b in budgets), Decimal("0.00"))
+    spent_total = sum(spent_by_category.values(), Decimal("0.00"))
+    return {
+        "month":         first,
+        "days_in_month": days,
+        "days_elapsed":  elapsed,
+        "budgets":       budgets,
+        "totals": {
+            "limit":     limit_total,
+            "spent":     spent_total,
+            "remaining": limit_total - spent_total,
+        },
+        "unconverted":   fx.currencies(row for row in unconverted if row["month"] == first),
+    }
+
+
+BUNDLE_SECTIONS = ("dashboard", "annual", "categories", "budgets", "budget_status")
+
+
+def bundle(user, sections, current):
+    """
+    The bodies of several endpoints in one response, from one pass over
+    the user's data: a single MonthlyRollup scan per (month, currency,
+    category), regrouped in Python, feeds the dashboard totals, annual
+    spending, the category summary and this month's budget status, and
+    the categories and budgets are read at most once each.
+
+    Sections: dashboard (/dashboard/), annual
+    (/analytics/annual-spending/), categories (/categories/summary/,
+    which also lists every category), budgets (/budgets/) and
+    budget_status (/budgets/status/ for this month).
+    """
+    today = current.date()
+    first, next_first = month_bounds(today)
+    rows = _rollup_rows(user, by_category=True)
+    months = per_category = ([], [])
+    if {"dashboard", "annual"} & sections:
+        months = _converted(_regroup(rows, "month", "currency"), user, today)
+    if {"categories", "budget_status"} & sections:
+        per_category = _converted(_regroup(rows, "month", "currency", "category"), user, today)
+
+    result = {}
+    if "budgets" in sections:
+        result["budgets"] = FastBudgetSerializer(Budget.objects.filter(category__user=user), many=True).data
+    if "dashboard" in sections:
+        if "budgets" in result:
+            budget = sum(
+                (Decimal(b["amount"]) for b in result["budgets"]
+                 if first <= date.fromisoformat(b["month"]) < next_first),
+                Decimal("0.00"),
+            ) or 0
+        else:
+            budget = monthly_budget(user, current)
+        converted, unconverted = months
+        result["dashboard"] = dashboard(
+            monthly=_expense(row for row in converted if row["month"] == first),
+            budget=budget,
+            yearly=_expense(row for row in converted if row["month"].year == current.year),
+            recent=recent_transactions(user),
+            unconverted=fx.currencies(row for row in unconverted if row["month"].year == current.year),
+        )
+    if "annual" in sections:
+        result["annual"] = _annual(*months)
+    if "categories" in sections:
+        categories = Category.objects.filter(user=user).values("id", "name", "type", "color")
+        result["categories"] = _category_summary(*per_category, categories)
+    if "budget_status" in sections:
+        result["budget_status"] = _budget_status(*per_category, user, today, today)
+    return result
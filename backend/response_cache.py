@@ -0,0 +1,152 @@
+"""
+Per-user response cache for the read-heavy analytics views.
+
+Entries are keyed by (endpoint, user, data version, query string, day).
+Writes never delete entries; they bump the user's version counter, so
+every key built afterwards misses. The ETag is derived from the same
+key, which lets an If-None-Match request be answered with 304 after a
+single cache lookup and no database work.
+
+The cache must be one every worker process shares (RESPONSE_CACHE=file
+or redis): a per-process cache would keep serving, and confirming with
+304s, what other workers' writes have changed. Without one the
+decorators pass every request through to the view.
+"""
+import hashlib
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.timezone import localdate
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+CACHE_ALIAS = "responses"
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def enabled():
+    """Whether a response cache is configured (see RESPONSE_CACHE)."""
+    return not isinstance(_cache(), DummyCache)
+
+
+def _version_key(user_id):
+    return f"rc:v:{user_id}"
+
+
+def user_version(user_id):
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # Seed from the clock rather than 1: if the counter was evicted,
+        # old entries built on a small version number must not match again.
+        cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def bump(user_id):
+    """Invalidate every cached response for this user."""
+    if user_id is None or not enabled():
+        return
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def bump_on_commit(user_id):
+    """
+    bump() once the current database transaction commits (at once outside
+    one). Bumping earlier lets a concurrent reader cache the data it can
+    still see, the old data, under the new version, where it would be
+    served until the entry expires. Write paths use this.
+    """
+    transaction.on_commit(partial(bump, user_id))
+
+
+def _key_and_etag(name, request):
+    # the day is part of the key because "this month/year" figures roll over
+    key = "rc:{}:{}:{}:{}:{}".format(
+        name, request.user.pk, user_version(request.user.pk),
+        request.GET.urlencode(), localdate().isoformat(),
+    )
+    return key, '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+
+
+def _not_modified(request, etag):
+    return etag in parse_etags(request.headers.get("If-None-Match", ""))
+
+
+def _finish(response, etag):
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def cached_response(name):
+    """
+    Cache successful GET responses of a function view per user. Apply it
+    below the DRF decorators so it receives the authenticated request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "GET" or not request.user.is_authenticated or not enabled():
+                return view(request, *args, **kwargs)
+
+            key, etag = _key_and_etag(name, request)
+            if _not_modified(request, etag):
+                return _finish(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+            data = _cache().get(key)
+            if data is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                _cache().set(key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+            return _finish(response, etag)
+        return wrapper
+    return decorator
+
+
+def _json(data):
+    return HttpResponse(JSONRenderer().render(data), content_type="application/json")
+
+
+def async_cached_response(name):
+    """
+    The same cache for plain-Django async views that return their data
+    (not a response); entries are shared with the sync view of that name.
+    The result is rendered with DRF's JSONRenderer so the bytes match.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if not enabled():
+                return _json(await view(request, *args, **kwargs))
+            key, etag = _key_and_etag(name, request)
+            if _not_modified(request, etag):
+                return _finish(HttpResponseNotModified(), etag)
+
+            data = _cache().get(key)
+            if data is None:
+                data = await view(request, *args, **kwargs)
+                _cache().set(key, data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+            return _finish(_json(data), etag)
+        return wrapper
+    return decorator
@@ -0,0 +1,204 @@
+"""
+Incremental maintenance of MonthlyRollup.
+
+Every write path that touches Transaction rows folds its changes into a
+dict of deltas keyed by (user_id, month, category, currency) and hands
+it to `apply`, inside the same atomic block as the write itself. Totals
+stay in the transactions' own currency; backend.fx converts on read. Small sets
+of deltas are applied as one UPDATE per bucket; big ones (imports, the
+recurring worker) read the buckets once and write them back in bulk.
+An INSERT of a new bucket that loses a race with a concurrent write of
+the same bucket (possible on PostgreSQL) adds to that write's row instead.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+from . import database
+from .models import MonthlyRollup, Transaction
+
+ZERO = Decimal("0")
+# More touched buckets than this and one locked read plus bulk writes beat
+# an UPDATE per bucket.
+BULK_THRESHOLD = 32
+_MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def add(deltas, user_id, tx_date, category, currency, amount, sign=1):
+    """Fold one transaction (sign=+1 added, -1 removed) into `deltas`."""
+    key = (user_id, tx_date.replace(day=1), category, currency)
+    income, expense, count = deltas.get(key, (ZERO, ZERO, 0))
+    amount = Decimal(amount)
+    if amount > 0:
+        income += sign * amount
+    elif amount < 0:
+        expense += sign * -amount
+    deltas[key] = (income, expense, count + sign)
+    return deltas
+
+
+def add_instance(deltas, tx, sign=1):
+    return add(deltas, tx.user_id, tx.date, tx.category, tx.currency, tx.amount, sign)
+
+
+def grouped(queryset):
+    """The rollup rows for a Transaction queryset, as one GROUP BY query."""
+    return (
+        queryset
+        .annotate(month=TruncMonth("date"))
+        .values("user_id", "month", "category", "currency")
+        .annotate(
+            income=Sum(Case(When(amount__gt=0, then=F("amount")), default=Value(ZERO), output_field=_MONEY)),
+            expense=Sum(Case(When(amount__lt=0, then=-F("amount")), default=Value(ZERO), output_field=_MONEY)),
+            n=Count("id"),
+        )
+        .order_by()
+    )
+
+
+def add_queryset(deltas, queryset, sign=1):
+    """Fold every row of `queryset` into `deltas` without loading the rows."""
+    for row in grouped(queryset):
+        key = (row["user_id"], row["month"], row["category"], row["currency"])
+        income, expense, count = deltas.get(key, (ZERO, ZERO, 0))
+        deltas[key] = (
+            income + sign * row["income"],
+            expense + sign * row["expense"],
+            count + sign * row["n"],
+        )
+    return deltas
+
+
+def add_moved(deltas, queryset, month=None, category=None):
+    """
+    Fold a bulk re-date and/or re-categorize of `queryset` into `deltas`:
+    each bucket is removed under its old key and re-added under the new
+    one. Must run before the UPDATE, while the old values are still there.
+    """
+    for row in grouped(queryset):
+        key = (row["user_id"], row["month"], row["category"], row["currency"])
+        new_key = (row["user_id"], month or row["month"], category or row["category"], row["currency"])
+        for bucket, sign in ((key, -1), (new_key, 1)):
+            income, expense, count = deltas.get(bucket, (ZERO, ZERO, 0))
+            deltas[bucket] = (
+                income + sign * row["income"],
+                expense + sign * row["expense"],
+                count + sign * row["n"],
+            )
+    return deltas
+
+
+def apply(deltas):
+    """Write accumulated deltas: one UPDATE per touched bucket, INSERT if missing."""
+    changes = {key: change for key, change in deltas.items() if any(change)}
+    if len(changes) > BULK_THRESHOLD:
+        return _apply_bulk(changes)
+    _apply_each(changes)
+
+
+def _apply_each(changes):
+    for (user_id, month, category, currency), (income, expense, count) in changes.items():
+        bucket = MonthlyRollup.objects.filter(user_id=user_id, month=month, category=category, currency=currency)
+        increments = {
+            "income_total":  F("income_total") + income,
+            "expense_total": F("expense_total") + expense,
+            "count":         F("count") + count,
+        }
+        if not bucket.update(**increments):
+            try:
+                with transaction.atomic():
+                    MonthlyRollup.objects.create(
+                        user_id=user_id, month=month, category=category, currency=currency,
+                        income_total=income, expense_total=expense, count=count,
+                    )
+                continue
+            except IntegrityError:
+                # created by a concurrent write since the UPDATE: add to it
+                bucket.update(**increments)
+        if count < 0:
+            bucket.filter(count__lte=0).delete()
+
+
+def _apply_bulk(changes, batch_size=500):
+    """
+    `apply` for many buckets: the users' rows for the touched months are
+    read in one locked query, adjusted in Python and written back with
+    bulk writes.
+    """
+    rows = MonthlyRollup.objects.select_for_update().filter(
+        user_id__in={key[0] for key in changes}, month__in={key[1] for key in changes},
+    )
+    existing = {(row.user_id, row.month, row.category, row.currency): row for row in rows}
+    updated, created, emptied = [], {}, []
+    for key, (income, expense, count) in changes.items():
+        row = existing.get(key)
+        if row is None:
+            user_id, month, category, currency = key
+            created[key] = MonthlyRollup(
+                user_id=user_id, month=month, category=category, currency=currency,
+                income_total=income, expense_total=expense, count=count,
+            )
+            continue
+        row.income_total += income
+        row.expense_total += expense
+        row.count += count
+        (emptied if row.count <= 0 else updated).append(row)
+    database.bulk_update(updated, ["income_total", "expense_total", "count"], batch_size=batch_size)
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.bulk_create(created.values(), batch_size=batch_size)
+    except IntegrityError:
+        # the locked read can't lock buckets that didn't exist yet
+        _apply_each({key: changes[key] for key in created})
+    if emptied:
+        MonthlyRollup.objects.filter(id__in=[row.id for row in emptied]).delete()
+
+
+def rename_category(user_id, old, new):
+    """
+    Move a renamed category's buckets to its new name, merging them into
+    any already there: one read and delete of the old buckets, then `apply`.
+    """
+    buckets = MonthlyRollup.objects.filter(user_id=user_id, category=old)
+    deltas = {}
+    for row in buckets.values("month", "currency", "income_total", "expense_total", "count"):
+        key = (user_id, row["month"], new, row["currency"])
+        deltas[key] = (row["income_total"], row["expense_total"], row["count"])
+    buckets.delete()
+    apply(deltas)
+
+
+def record(tx, sign=1):
+    """Shortcut for a single transaction write."""
+    apply(add_instance({}, tx, sign))
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    """
+    Recompute rollups from the ledger: one grouped scan of Transaction and
+    bulk inserts, replacing whatever is there for the selected users.
+    """
+    transactions = Transaction.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in grouped(transactions).iterator(chunk_size=batch_size):
+            batch.append(MonthlyRollup(
+                user_id=row["user_id"], month=row["month"], category=row["category"], currency=row["currency"],
+                income_total=row["income"], expense_total=row["expense"], count=row["n"],
+            ))
+            if len(batch) >= batch_size:
+                MonthlyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        MonthlyRollup.objects.bulk_create(batch)
+        created += len(batch)
+    return created
@@ -0,0 +1,89 @@
+"""
+Full-text search over Transaction.description.
+
+On SQLite this is an external-content FTS5 table that shares rowids with
+backend_transaction and is kept in sync by triggers, so every write path
+(save, update(), bulk_create, raw deletes) is covered. Other databases
+fall back to icontains.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "backend_transaction_fts"
+
+_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON backend_transaction BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END""",
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON backend_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        END""",
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF description ON backend_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+        END""",
+}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def install(connection):
+    """
+    Create the FTS table and triggers if missing, rebuilding the index when
+    any trigger had to be (re)created. Safe to run repeatedly: SQLite drops
+    a table's triggers whenever a migration remakes backend_transaction,
+    so this also runs after every migrate.
+    """
+    if connection.vendor != "sqlite" or "backend_transaction" not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "description, content='backend_transaction', content_rowid='id')"
+        )
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'backend_transaction'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in _TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(_TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall(connection):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name in _TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def search_terms(text):
+    """The words searched for in `text`; none means the search matches everything."""
+    return _WORD.findall(text or "")
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    return " ".join(f'"{word}"*' for word in search_terms(text))
+
+
+def search_transactions(queryset, text):
+    words = search_terms(text)
+    if not words:
+        return queryset
+    if connections[queryset.db].vendor != "sqlite":
+        for word in words:
+            queryset = queryset.filter(description__icontains=word)
+        return queryset
+    return queryset.filter(id__in=RawSQL(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [fts_query(text)]
+    ))
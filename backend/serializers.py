@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from .models import Transaction
-from .models import Budget, Category, Profile
+from .models import Budget, Category, Profile, RecurringRule
+from . import fx, recurring
 from django.contrib.auth import get_user_model
+from .fastjson import values_serializer_for
 
 
 User = get_user_model()
@@ -27,6 +29,21 @@ class ProfileSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+def validate_currency_code(value):
+    code = fx.normalize(value)
+    if not fx.is_code(code):
+        raise serializers.ValidationError('Enter a three-letter ISO 4217 currency code.')
+    return code
+
+
+class ProfileCurrencyDefault:
+    """Default for a currency field: the requesting user's profile currency."""
+    requires_context = True
+
+    def __call__(self, serializer_field):
+        return fx.currency_of(serializer_field.context['request'].user)
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -39,22 +56,81 @@ class CategorySerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     class Meta:
         model = Category
-        fields = '__all__'
+        exclude = ('seq',)    # sync bookkeeping, served by /api/sync/
+
+class UserCategoryField(serializers.PrimaryKeyRelatedField):
+    """Accepts only the requesting user's categories."""
+
+    def get_queryset(self):
+        request = self.context.get("request")
+        if request is None:
+            return Category.objects.none()
+        return Category.objects.filter(user=request.user)
+
 
 class BudgetSerializer(serializers.ModelSerializer):
-    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
+    category = UserCategoryField()
 
     class Meta:
         model = Budget
-        fields = '__all__'
+        exclude = ('seq',)    # sync bookkeeping, served by /api/sync/
 
 class TransactionSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
     class Meta:
         model = Transaction
-        fields = '__all__'
+        fields = ['id', 'description', 'amount', 'currency', 'date', 'category', 'user']
+        extra_kwargs = {
+            'description': {'required': False, 'allow_blank': True},
+            'category' : {'required': False},
+            'currency': {'default': ProfileCurrencyDefault()},
+        }
+
+    def validate_currency(self, value):
+        return validate_currency_code(value)
+
+
+class RecurringRuleSerializer(serializers.ModelSerializer):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+
+    class Meta:
+        model = RecurringRule
+        fields = ['id', 'description', 'amount', 'currency', 'category', 'frequency', 'interval',
+                  'start_date', 'until', 'count', 'occurrences', 'next_date', 'user']
+        read_only_fields = ['occurrences', 'next_date']
         extra_kwargs = {
             'description': {'required': False, 'allow_blank': True},
-            'category' : {'required': False}
+            'category': {'required': False},
+            'currency': {'default': ProfileCurrencyDefault()},
         }
 
+    def validate_currency(self, value):
+        return validate_currency_code(value)
+
+    def validate(self, attrs):
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        until = attrs.get('until', getattr(self.instance, 'until', None))
+        if start and until and until < start:
+            raise serializers.ValidationError({'until': 'until must not be before start_date.'})
+        return attrs
+
+    def create(self, validated_data):
+        return super().create({**validated_data, 'next_date': validated_data['start_date']})
+
+    def update(self, instance, validated_data):
+        # a new frequency, interval or start begins the count again; rows
+        # already created for dates still on the schedule are not repeated
+        if any(name in validated_data and validated_data[name] != getattr(instance, name)
+               for name in recurring.SCHEDULE_FIELDS):
+            instance.occurrences = 0
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        recurring.schedule(instance).save()
+        return instance
+
+
+# values_list() + orjson read paths for the list endpoints (see backend.fastjson)
+FastTransactionSerializer = values_serializer_for(TransactionSerializer)
+FastCategorySerializer = values_serializer_for(CategorySerializer)
+FastBudgetSerializer = values_serializer_for(BudgetSerializer)
+FastRecurringRuleSerializer = values_serializer_for(RecurringRuleSerializer)
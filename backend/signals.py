@@ -1,9 +1,85 @@
-from django.db.models.signals import post_save
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, post_migrate, pre_save
 from django.dispatch import receiver
 from django.conf import settings
-from .models import Profile
+from django.contrib.auth import get_user_model
+from .models import Profile, Transaction, Budget, Category, Tombstone
+from .response_cache import bump_on_commit
+from . import authentication, database, instrumentation, search, sync
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+
+# StatelessJWTAuthentication caches whether an account is active.
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def forget_account_state(sender, instance, created=False, **kwargs):
+    if not created:
+        authentication.forget()
+
+
+# Link the owner's transactions filed under this name (created before the
+# category existed, or after a same-named one was deleted); Transaction.save
+# only resolves the FK when a row's category changes.
+@receiver(post_save, sender=Category)
+def link_transactions(sender, instance, **kwargs):
+    Transaction.objects.filter(
+        user_id=instance.user_id, category=instance.name, category_fk__isnull=True,
+    ).update(category_fk=instance)
+
+
+# Any change to a user's data invalidates their cached analytics, once it
+# is committed. Bulk paths (update()/bulk_create) don't send these and
+# bump directly.
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=Category)
+@receiver(post_save, sender=Profile)   # the currency every aggregate is converted to
+def invalidate_user_cache(sender, instance, **kwargs):
+    bump_on_commit(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Budget)
+def invalidate_budget_owner_cache(sender, instance, **kwargs):
+    bump_on_commit(instance.category.user_id)
+
+
+# Number every write for incremental sync (backend.sync). Bulk paths
+# allocate one number for the operation and stamp it themselves.
+@receiver(pre_save, sender=Transaction)
+@receiver(pre_save, sender=Category)
+def stamp_change(sender, instance, **kwargs):
+    instance.seq = sync.allocate(instance.user_id)
+
+
+@receiver(pre_save, sender=Budget)
+def stamp_budget_change(sender, instance, **kwargs):
+    instance.seq = sync.allocate(instance.category.user_id)
+
+
+TOMBSTONE_KINDS = {Transaction: Tombstone.TRANSACTION, Category: Tombstone.CATEGORY, Budget: Tombstone.BUDGET}
+
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Budget)
+def leave_tombstone(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, get_user_model()):
+        return      # the account and its change log are going too
+    user_id = instance.category.user_id if sender is Budget else instance.user_id
+    sync.bury(user_id, TOMBSTONE_KINDS[sender], [instance.pk])
+
+
+# Table remakes in later migrations drop the FTS triggers; put them back.
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    if sender.name == "backend":
+        search.install(connections[using])
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    database.configure(connection)
+    instrumentation.install(connection)
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend import async_views
+from backend.models import Category
+
+PAIRS = [
+    ("/api/dashboard/", "/api/async/dashboard/"),
+    ("/api/analytics/annual-spending/", "/api/async/analytics/annual-spending/"),
+    ("/api/categories/summary/", "/api/async/categories/summary/"),
+]
+
+
+# committed data: the async views read it on other threads' connections
+class AsyncViewTests(TransactionTestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="async", password=None)
+        Category.objects.create(user=user, name="Food", type="expense")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        for amount, day in (("-12.50", "2024-01-02"), ("-4.00", "2024-02-03"), ("900.00", "2024-02-28")):
+            self.client.post("/api/transactions/", {"amount": amount, "date": day, "category": "Food"},
+                             format="json")
+
+    def test_same_bodies_as_the_sync_views(self):
+        for sync_url, async_url in PAIRS:
+            with self.subTest(url=async_url):
+                expected = self.client.get(sync_url)
+                response = self.client.get(async_url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_workers_close_old_connections(self):
+        with mock.patch.object(async_views, "close_old_connections") as close:
+            self.assertEqual(self.client.get("/api/async/dashboard/").status_code, 200)
+        # before and after the token check and each of the dashboard's three queries
+        self.assertEqual(close.call_count, 8)
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend import authentication
+from backend.authentication import StatelessJWTAuthentication
+
+
+class StatelessJWTTests(APITestCase):
+    def setUp(self):
+        authentication.forget()
+        self.user = get_user_model().objects.create_user(username="jwt", email="jwt@example.com", password=None)
+        self.token = str(AccessToken.for_user(self.user))
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}")
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def get(self, token=None):
+        return self.client.get("/api/me/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}")
+
+    def test_user_comes_from_the_token(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        # other fields load on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "jwt@example.com")
+
+    def test_views_see_the_user(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], "jwt@example.com")
+
+    def test_deactivating_locks_out_at_once(self):
+        self.assertEqual(self.get().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_deleting_locks_out_at_once(self):
+        self.assertEqual(self.get().status_code, 200)
+        self.user.delete()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_change_elsewhere_locks_out_in_the_next_period(self):
+        self.authenticate()
+        # as another process would: no signal reaches this one
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.authenticate()
+        with mock.patch.object(authentication, "_generation", return_value=authentication._generation() + 1):
+            with self.assertRaisesMessage(AuthenticationFailed, "User is inactive"):
+                self.authenticate()
+
+    def test_token_without_a_user_is_invalid(self):
+        token = AccessToken.for_user(self.user)
+        del token["user_id"]
+        with self.assertRaises(InvalidToken):
+            self.authenticate(str(token))
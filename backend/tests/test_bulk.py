@@ -0,0 +1,69 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from backend.models import RecurringRule, Transaction
+
+
+class BulkEndpointTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="bulk", password=None)
+        self.client.force_authenticate(self.user)
+        self.tx = Transaction.objects.create(user=self.user, amount=-5, date=date(2024, 1, 2), category="Food")
+
+    def test_array_body_is_a_400(self):
+        for method, url in (("patch", "/api/transactions/bulk/"), ("post", "/api/transactions/bulk-delete/")):
+            with self.subTest(url=url):
+                response = getattr(self.client, method)(url, [self.tx.id], format="json")
+                self.assertEqual(response.status_code, 400)
+        self.assertTrue(Transaction.objects.filter(pk=self.tx.pk).exists())
+
+    def test_filter_that_narrows_nothing_is_a_400(self):
+        Transaction.objects.create(user=self.user, amount=-8, date=date(2024, 1, 3), category="Rent")
+        for criteria in ({"catgory": "Food"}, {"category": ""}, {"category": "  ", "type": None},
+                         {"search": "!!!"}):
+            for method, url, body in (("patch", "/api/transactions/bulk/", {"set": {"category": "Other"}}),
+                                      ("post", "/api/transactions/bulk-delete/", {})):
+                with self.subTest(url=url, filter=criteria):
+                    response = getattr(self.client, method)(url, {**body, "filter": criteria}, format="json")
+                    self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(Transaction.objects.values_list("category", flat=True)), ["Food", "Rent"])
+
+    def test_filter_selects_its_rows(self):
+        Transaction.objects.create(user=self.user, amount=-8, date=date(2024, 1, 3), category="Rent")
+        response = self.client.post("/api/transactions/bulk-delete/", {"filter": {"category": "Rent", "search": ""}},
+                                    format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(list(Transaction.objects.values_list("category", flat=True)), ["Food"])
+
+
+class OccurrenceRedateTests(APITestCase):
+    """Moving a rule's occurrence onto a date the rule already has is a 400."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="redate", password=None)
+        self.client.force_authenticate(self.user)
+        rule = RecurringRule.objects.create(user=self.user, amount=-20, start_date=date(2024, 1, 1))
+        self.january, self.february = (
+            Transaction.objects.create(user=self.user, amount=-20, date=day, category="N/A", recurring_rule=rule)
+            for day in (date(2024, 1, 1), date(2024, 2, 1))
+        )
+
+    def assertUnchanged(self):
+        self.february.refresh_from_db()
+        self.assertEqual(self.february.date, date(2024, 2, 1))
+
+    def test_put(self):
+        response = self.client.put(f"/api/transactions/{self.february.id}/",
+                                   {"amount": "-20.00", "date": "2024-01-01", "category": "N/A"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.data)
+        self.assertUnchanged()
+
+    def test_bulk_update(self):
+        response = self.client.patch("/api/transactions/bulk/",
+                                     {"ids": [self.february.id], "set": {"date": "2024-01-01"}}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.data)
+        self.assertUnchanged()
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from backend.models import Transaction
+
+URL = "/api/transactions/export/"
+
+
+class ExportFormatTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="export", password=None)
+        Transaction.objects.create(user=user, amount=-5, date=date(2024, 1, 2), category="Food")
+        self.client.force_authenticate(user)
+
+    def test_unknown_format_is_a_400(self):
+        response = self.client.get(URL, {"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("format must be one of", response.json()["error"])
+
+    def test_known_formats_stream(self):
+        for name, content_type in (("csv", "text/csv"), ("ndjson", "application/x-ndjson")):
+            with self.subTest(format=name):
+                response = self.client.get(URL, {"format": name})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["Content-Type"].startswith(content_type))
+                self.assertIn(b"Food", b"".join(response.streaming_content))
+
+    def test_csv_is_the_default(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        b"".join(response.streaming_content)
+
+    def test_anonymous_request_gets_a_json_401(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(URL, {"format": "csv"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["Content-Type"], "application/json")
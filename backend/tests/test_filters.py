@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+
+class AmountFilterTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(username="filters", password=None))
+
+    def test_non_finite_amounts_are_a_400(self):
+        for params in ({"amount_min": "nan"}, {"amount_max": "Infinity"}, {"amount_min": "-inf"}):
+            with self.subTest(params=params):
+                response = self.client.get("/api/transactions/", params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("must be a number", response.data["error"])
@@ -0,0 +1,68 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.utils.timezone import localdate
+from rest_framework.test import APITestCase
+
+from backend import fx
+from backend.models import Category, FxRate
+
+
+class MissingRateTests(APITestCase):
+    """With no EUR rate loaded, the reports leave EUR out and say so instead of failing."""
+
+    def setUp(self):
+        fx.clear_cache()
+        self.user = get_user_model().objects.create_user(username="fx", password=None)
+        self.client.force_authenticate(self.user)
+        Category.objects.create(user=self.user, name="Food", type="expense")
+        # through the API, which keeps the monthly rollups the reports read
+        for amount, currency in (("-10.00", "USD"), ("-20.00", "EUR")):
+            response = self.client.post("/api/transactions/", {
+                "amount": amount, "date": localdate().isoformat(), "category": "Food", "currency": currency,
+            }, format="json")
+            self.assertEqual(response.status_code, 201, response.content)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.json()
+
+    def test_dashboard(self):
+        data = self.get("/api/dashboard/")
+        self.assertEqual(Decimal(str(data["monthlySpending"])), 10)
+        self.assertEqual(data["unconverted"], ["EUR"])
+
+    def test_annual_and_categories(self):
+        [year] = self.get("/api/analytics/annual-spending/")
+        self.assertEqual((year["expense"], year["unconverted"]), (10.0, ["EUR"]))
+        [food] = self.get("/api/categories/summary/")
+        self.assertEqual((Decimal(food["total_spent"]), food["unconverted"]), (10, ["EUR"]))
+
+    def test_budget_status_bundle_and_trends(self):
+        self.assertEqual(self.get("/api/budgets/status/")["unconverted"], ["EUR"])
+        bundle = self.get("/api/bundle/")
+        self.assertEqual(bundle["dashboard"]["unconverted"], ["EUR"])
+        self.assertEqual(bundle["budget_status"]["unconverted"], ["EUR"])
+        trends = self.get("/api/analytics/trends/")
+        self.assertEqual(trends["unconverted"], ["EUR"])
+        self.assertEqual(trends["series"][-1]["expense"], 10.0)
+
+    def test_balance_timeline(self):
+        data = self.get("/api/balance/")
+        self.assertEqual((Decimal(str(data["closing"])), data["unconverted"]), (-10, ["EUR"]))
+        self.assertEqual(Decimal(str(data["points"][-1]["change"])), -10)
+
+    def test_balance_timeline_converts_with_a_rate(self):
+        FxRate.objects.create(date=date(2000, 1, 1), base="EUR", quote="USD", rate=Decimal("1.5"))
+        data = self.get("/api/balance/")
+        self.assertEqual((Decimal(str(data["closing"])), data["unconverted"]), (-40, []))
+
+    def test_converts_once_a_rate_is_loaded(self):
+        day = date(2024, 1, 31)
+        with self.assertRaises(fx.MissingRate):
+            fx.rate("EUR", "USD", day)
+        FxRate.objects.create(date=date(2024, 1, 1), base="EUR", quote="USD", rate=Decimal("1.1"))
+        # the miss wasn't memoized, so no cache clear is needed
+        self.assertEqual(fx.rate("EUR", "USD", day), Decimal("1.1"))
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+
+from backend.models import Transaction
+
+
+class UnreadableStatementTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="importer", password=None)
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content):
+        return self.client.post(
+            "/api/transactions/import/",
+            {"file": SimpleUploadedFile("statement.csv", content)},
+            format="multipart",
+        )
+
+    def test_non_utf8_csv_is_rejected(self):
+        body = "date,amount,description\n2024-01-02,-3.50,Café Crème\n".encode("cp1252")
+        response = self.upload(body)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("UTF-8", response.data["error"])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_malformed_csv_is_rejected(self):
+        # a quoted field running past csv.field_size_limit() raises csv.Error
+        response = self.upload(b'date,amount,description\n2024-01-02,-3.50,"' + b"x" * 200000 + b"\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_utf8_csv_still_imports(self):
+        response = self.upload("date,amount,description\n2024-01-02,-3.50,Café\n".encode())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 1)
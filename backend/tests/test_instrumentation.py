@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from backend.instrumentation import metrics
+from backend.models import Transaction
+
+
+class StreamedResponseMetricsTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="metrics", password=None)
+        Transaction.objects.create(user=user, amount=-5, date=date(2024, 1, 2), category="Food")
+        self.client.force_authenticate(user)
+        metrics.reset()
+
+    def test_queries_run_while_streaming_are_counted(self):
+        response = self.client.get("/api/transactions/", {"stream": "ndjson"})
+        self.assertFalse(metrics.duration_count["transaction_list"])    # reported on close
+        body = b"".join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 1)
+        self.assertEqual(metrics.duration_count["transaction_list"], 1)
+        # the rows are read from the database inside the body's iterator
+        self.assertGreaterEqual(metrics.db_queries["transaction_list"], 1)
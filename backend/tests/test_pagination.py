@@ -0,0 +1,74 @@
+import base64
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from backend.models import Transaction
+from backend.pagination import encode_cursor
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="pages", password=None)
+        self.client.force_authenticate(self.user)
+        # several rows share a date, so the id has to break the ties
+        for n, day in enumerate((2, 2, 2, 3, 5, 5, 9)):
+            Transaction.objects.create(user=self.user, amount=-(n + 1), date=date(2024, 1, day), category="Food")
+
+    def get(self, params, status_code=200, **extra):
+        response = self.client.get("/api/transactions/", params, **extra)
+        self.assertEqual(response.status_code, status_code, response.content)
+        return response.json()
+
+    def walk(self, params, **extra):
+        ids, page = [], self.get({**params, "limit": 2}, **extra)
+        while True:
+            ids += [row["id"] for row in page["results"]]
+            if page["next"] is None:
+                return ids
+            page = self.get({**params, "limit": 2, "cursor": page["next"]}, **extra)
+
+    def test_pages_cover_the_list_once_in_order(self):
+        expected = [row["id"] for row in self.get({})]
+        self.assertEqual(expected, list(Transaction.objects.order_by("-date", "-id").values_list("id", flat=True)))
+        for extra in ({}, {"HTTP_ACCEPT": "application/json; indent=2"}):
+            with self.subTest(extra=extra):
+                self.assertEqual(self.walk({}, **extra), expected)
+
+    def test_pages_of_a_filtered_list(self):
+        expected = list(
+            Transaction.objects.filter(date__lt=date(2024, 1, 9)).order_by("-date", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(self.walk({"date_to": "2024-01-08"}), expected)
+
+    def test_rows_added_while_paging_do_not_shift_the_pages(self):
+        first = self.get({"limit": 3})
+        Transaction.objects.create(user=self.user, amount=-1, date=date(2024, 2, 1), category="Food")
+        rest = self.get({"limit": 100, "cursor": first["next"]})
+        seen = [row["id"] for row in first["results"] + rest["results"]]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 7)
+
+    def test_last_page_has_no_cursor(self):
+        self.assertIsNone(self.get({"limit": 7})["next"])
+        self.assertIsNotNone(self.get({"limit": 6})["next"])
+
+    def test_bad_cursor_is_a_400(self):
+        garbage = base64.urlsafe_b64encode(b"not-a-date|x").decode()
+        for cursor in ("!!!", "abc", garbage, encode_cursor("2024-01-02", "x")):
+            for params in ({"cursor": cursor}, {"cursor": cursor, "stream": "json"}):
+                with self.subTest(params=params):
+                    self.assertEqual(self.get(params, 400)["error"], "Invalid cursor")
+
+    def test_bad_limit_is_a_400(self):
+        for limit in ("0", "-1", "ten", "1.5"):
+            with self.subTest(limit=limit):
+                self.assertIn("limit", self.get({"limit": limit}, 400)["error"])
+
+    def test_limit_is_capped(self):
+        with mock.patch("backend.pagination.MAX_PAGE_SIZE", 5):
+            page = self.get({"limit": 10 ** 6})
+        self.assertEqual(len(page["results"]), 5)
+        self.assertIsNotNone(page["next"])
@@ -0,0 +1,52 @@
+from datetime import date
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from backend.models import Category, Transaction
+
+
+class CheckQueryPlansCommandTests(TestCase):
+    def test_hot_endpoints_stay_on_indexes(self):
+        out = StringIO()
+        call_command("check_query_plans", stdout=out, stderr=StringIO())
+        self.assertIn("endpoints OK", out.getvalue())
+
+
+@skipUnless(connection.vendor == "sqlite", "index names are checked in SQLite query plans")
+class TransactionIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="plans", password=None)
+        Category.objects.create(user=cls.user, name="Food")
+        Transaction.objects.bulk_create([
+            Transaction(user=cls.user, amount=-i, date=date(2024, 1, i % 28 + 1), category="Food")
+            for i in range(1, 50)
+        ])
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_list_ordering_uses_user_date_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(user=self.user, date__gte=date(2024, 1, 10)).order_by("-date", "-id"),
+            "tx_user_date_idx",
+        )
+
+    def test_category_filter_uses_user_category_date_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(user=self.user, category="Food").order_by("-date", "-id"),
+            "tx_user_cat_date_idx",
+        )
+
+    def test_expense_filter_uses_partial_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(user=self.user, amount__lt=0).order_by("-date", "-id"),
+            "tx_expense_user_date_idx",
+        )
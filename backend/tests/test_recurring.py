@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from backend import recurring
+from backend.models import RecurringRule, Transaction
+from backend.tests.test_rollups import ConsistencyMixin
+
+
+class MaterializeTests(ConsistencyMixin, APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="recurring", password=None)
+        self.client.force_authenticate(self.user)
+
+    def rule(self, **fields):
+        return RecurringRule.objects.create(
+            user=self.user, amount=-10, category="Rent", next_date=fields["start_date"], **fields,
+        )
+
+    def dates(self, rule):
+        return list(Transaction.objects.filter(recurring_rule=rule).order_by("date").values_list("date", flat=True))
+
+    def test_rerun_creates_nothing(self):
+        rule = self.rule(frequency=RecurringRule.WEEKLY, start_date=date(2024, 1, 1))
+        self.assertEqual(recurring.materialize(date(2024, 1, 31)), {"rules": 1, "created": 5, "skipped": 0})
+        self.assertEqual(recurring.materialize(date(2024, 1, 31)), {"rules": 0, "created": 0, "skipped": 0})
+        self.assertEqual(len(self.dates(rule)), 5)
+        self.assertConsistent(self.user)
+
+    def test_rerun_after_lost_progress_skips_what_exists(self):
+        rule = self.rule(frequency=RecurringRule.WEEKLY, start_date=date(2024, 1, 1))
+        recurring.materialize(date(2024, 1, 31))
+        # the rows committed, the rule's progress did not
+        RecurringRule.objects.filter(pk=rule.pk).update(occurrences=0, next_date=rule.start_date)
+        self.assertEqual(recurring.materialize(date(2024, 2, 7)), {"rules": 1, "created": 1, "skipped": 5})
+        self.assertEqual(len(self.dates(rule)), 6)
+        self.assertConsistent(self.user)
+
+    def test_schedule_edit_keeps_the_dates_still_on_it(self):
+        rule = self.rule(frequency=RecurringRule.WEEKLY, interval=2, start_date=date(2024, 1, 1))
+        recurring.materialize(date(2024, 1, 31))
+        self.assertEqual(self.dates(rule), [date(2024, 1, 1), date(2024, 1, 15), date(2024, 1, 29)])
+
+        response = self.client.put(f"/api/recurring/{rule.id}/", {
+            "amount": -10, "category": "Rent", "frequency": RecurringRule.WEEKLY, "interval": 1,
+            "start_date": "2024-01-01",
+        }, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(recurring.materialize(date(2024, 1, 31)), {"rules": 1, "created": 2, "skipped": 3})
+        self.assertEqual([day.day for day in self.dates(rule)], [1, 8, 15, 22, 29])
+        self.assertConsistent(self.user)
+
+    def test_catch_up_is_spread_over_runs(self):
+        rule = self.rule(frequency=RecurringRule.DAILY, start_date=date(2024, 1, 1))
+        for _ in range(4):
+            recurring.materialize(date(2024, 1, 31), limit=10)
+        self.assertEqual(self.dates(rule), [date(2024, 1, day) for day in range(1, 32)])
+        self.assertConsistent(self.user)
+
+    def test_month_end_and_count(self):
+        rule = self.rule(start_date=date(2024, 1, 31), count=3)
+        recurring.materialize(date(2024, 12, 31))
+        self.assertEqual(self.dates(rule), [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)])
+        rule.refresh_from_db()
+        self.assertIsNone(rule.next_date)
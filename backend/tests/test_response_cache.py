@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from backend.models import Transaction
+from backend.response_cache import enabled, user_version
+
+# what RESPONSE_CACHE=file or redis provide, without the file or the server
+SHARED_CACHE = override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-responses"},
+})
+
+
+@SHARED_CACHE
+class InvalidationTests(TestCase):
+    def test_version_moves_when_the_write_commits(self):
+        user = get_user_model().objects.create_user(username="cache", password=None)
+        before = user_version(user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=user, amount=-5, date=date(2024, 1, 2), category="Food")
+            # a reader now would cache what it sees under `before`, not a newer version
+            self.assertEqual(user_version(user.id), before)
+        self.assertNotEqual(user_version(user.id), before)
+
+
+class CachedViewTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="etag", password=None)
+        self.client.force_authenticate(self.user)
+
+    def test_off_without_a_shared_cache(self):
+        # the default: a per-process cache would go stale in the other workers
+        self.assertFalse(enabled())
+        response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    @SHARED_CACHE
+    def test_revalidates_with_a_shared_cache(self):
+        etag = self.client.get("/api/dashboard/")["ETag"]
+        self.assertEqual(self.client.get("/api/dashboard/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/transactions/", {"amount": -5, "date": "2024-01-02", "category": "Food"},
+                             format="json")
+        self.assertEqual(self.client.get("/api/dashboard/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import QuerySet
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from backend import balances, rollups
+from backend.models import Category, DailyBalance, MonthlyRollup, RecurringRule, Transaction
+
+
+def rollup_rows(user):
+    return {
+        (row.month, row.category, row.currency): (row.income_total, row.expense_total, row.count)
+        for row in MonthlyRollup.objects.filter(user=user)
+    }
+
+
+def balance_rows(user):
+    return {
+        (row.currency, row.date): (row.delta, row.balance, row.count)
+        for row in DailyBalance.objects.filter(user=user)
+    }
+
+
+class ConsistencyMixin:
+    """Compares the incrementally kept tables with what a rebuild from the ledger produces."""
+
+    def assertConsistent(self, user):
+        incremental = rollup_rows(user), balance_rows(user)
+        rollups.rebuild(user_ids=[user.id])
+        balances.rebuild(user_ids=[user.id])
+        self.assertEqual(incremental, (rollup_rows(user), balance_rows(user)))
+
+
+class CategoryRenameTests(ConsistencyMixin, APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="rename", password=None)
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name="Food", type="expense")
+        for amount, day, category in ((-5, date(2024, 1, 2), "Food"), (-7, date(2024, 2, 3), "Food"),
+                                      (-11, date(2024, 1, 9), "Groceries")):
+            self.client.post("/api/transactions/", {"amount": amount, "date": day.isoformat(),
+                                                    "category": category}, format="json")
+        RecurringRule.objects.create(user=self.user, amount=-9, category="Food", start_date=date(2024, 3, 1))
+
+    def rename(self, name):
+        response = self.client.put(f"/api/categories/{self.food.id}/",
+                                   {"name": name, "type": "expense", "color": "#000000"}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_buckets_move_to_the_new_name(self):
+        self.rename("Eating out")
+        self.assertEqual(Transaction.objects.filter(user=self.user, category="Eating out").count(), 2)
+        self.assertEqual(RecurringRule.objects.get(user=self.user).category, "Eating out")
+        self.assertEqual({key[1] for key in rollup_rows(self.user)}, {"Eating out", "Groceries"})
+        self.assertConsistent(self.user)
+
+    def test_merges_into_buckets_under_the_new_name(self):
+        # "Groceries" has an unlinked transaction in January already
+        self.rename("Groceries")
+        self.assertEqual(rollup_rows(self.user)[(date(2024, 1, 1), "Groceries", "USD")][2], 2)
+        self.assertConsistent(self.user)
+
+
+class WritePathConsistencyTests(ConsistencyMixin, APITestCase):
+    """Every write endpoint leaves MonthlyRollup and DailyBalance as a rebuild would."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="consistency", password=None)
+        self.client.force_authenticate(self.user)
+        Category.objects.create(user=self.user, name="Food", type="expense")
+        Category.objects.create(user=self.user, name="Salary", type="income")
+
+    def post(self, amount, day, category="Food", currency="USD"):
+        response = self.client.post("/api/transactions/", {
+            "amount": amount, "date": day.isoformat(), "category": category, "currency": currency,
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def upload(self, rows):
+        body = "date,amount,description,currency\n" + "".join(
+            f"{day.isoformat()},{amount},row {n},{currency}\n" for n, (day, amount, currency) in enumerate(rows)
+        )
+        response = self.client.post("/api/transactions/import/",
+                                    {"file": SimpleUploadedFile("statement.csv", body.encode())}, format="multipart")
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_create_update_delete(self):
+        first = self.post(-5, date(2024, 1, 2))
+        self.post(-7, date(2024, 3, 4), currency="EUR")
+        self.post(100, date(2024, 2, 1), category="Salary")
+        self.assertConsistent(self.user)
+
+        # back-dated, into another month, category and currency
+        response = self.client.put(f"/api/transactions/{first}/", {
+            "amount": -6, "date": "2023-12-30", "category": "Salary", "currency": "EUR",
+        }, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertConsistent(self.user)
+
+        self.assertEqual(self.client.delete(f"/api/transactions/{first}/").status_code, 204)
+        self.assertConsistent(self.user)
+
+    def test_bulk_update_and_delete(self):
+        # enough days for the bulk paths of both tables
+        start = date(2024, 1, 1)
+        for n in range(40):
+            self.post(-(n + 1), start + timedelta(days=n), currency="EUR" if n % 3 else "USD")
+        self.post(-9, date(2024, 6, 1))
+
+        for change in ({"category": "Salary"}, {"date": "2024-03-15"}, {"description": "moved"}):
+            with self.subTest(change=change):
+                response = self.client.patch("/api/transactions/bulk/", {
+                    "filter": {"date_to": "2024-01-31"}, "set": change,
+                }, format="json")
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertConsistent(self.user)
+
+        response = self.client.post("/api/transactions/bulk-delete/", {"filter": {"category": "Salary"}},
+                                    format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertConsistent(self.user)
+
+    def test_import(self):
+        self.post(-3, date(2024, 12, 31))
+        # a few days, then more days and months than are applied one by one
+        self.upload([(date(2024, 5, n), -n, "USD") for n in range(1, 6)])
+        self.assertConsistent(self.user)
+        start = date(2021, 1, 1)
+        self.upload([(start + timedelta(days=8 * n), n - 50, "EUR" if n % 2 else "USD") for n in range(150)])
+        self.assertConsistent(self.user)
+
+
+def first_update_misses():
+    """As if a concurrent write created the row between our UPDATE and INSERT."""
+    update, missed = QuerySet.update, []
+
+    def racing_update(queryset, **kwargs):
+        if "count" in kwargs and not missed:
+            missed.append(queryset)
+            return 0
+        return update(queryset, **kwargs)
+    return mock.patch.object(QuerySet, "update", racing_update)
+
+
+class ConcurrentFirstWriteTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="race", password=None)
+
+    def test_rollup_bucket(self):
+        MonthlyRollup.objects.create(user=self.user, month=date(2024, 1, 1), category="Food", currency="USD",
+                                     expense_total=5, count=1)
+        with first_update_misses():
+            rollups.apply(rollups.add({}, self.user.id, date(2024, 1, 9), "Food", "USD", -7))
+        row = MonthlyRollup.objects.get(user=self.user)
+        self.assertEqual((row.expense_total, row.count), (12, 2))
+
+    def test_balance_day(self):
+        DailyBalance.objects.create(user=self.user, date=date(2024, 1, 9), delta=-5, balance=-5, count=1)
+        with first_update_misses():
+            balances.apply(balances.add({}, self.user.id, date(2024, 1, 9), "USD", Decimal("-7")))
+        row = DailyBalance.objects.get(user=self.user)
+        self.assertEqual((row.delta, row.balance, row.count), (-12, -12, 2))
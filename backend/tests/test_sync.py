@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework.test import APITestCase
+
+from backend import sync
+from backend.models import Category, Tombstone, Transaction
+from backend.utils import create_default_categories, default_categories
+
+
+class DefaultCategorySyncTests(APITestCase):
+    def sync(self, since):
+        response = self.client.get("/api/sync/", {"since": since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_registration_stamps_the_categories(self):
+        response = self.client.post("/api/register/", {"email": "new@example.com", "password": "pw"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        user = get_user_model().objects.get(email="new@example.com")
+        self.client.force_authenticate(user)
+        cursor = self.sync(0)["seq"]
+        self.assertGreater(cursor, 0)
+        self.assertEqual(set(Category.objects.filter(user=user).values_list("seq", flat=True)), {cursor})
+
+    def test_incremental_sync_receives_them(self):
+        user = get_user_model().objects.create_user(username="sync", password=None)
+        self.client.force_authenticate(user)
+        Transaction.objects.create(user=user, amount=-5, date=date(2024, 1, 2), category="Food")
+        cursor = self.sync(0)["seq"]
+        with transaction.atomic():
+            create_default_categories(user)
+        names = {row["name"] for row in self.sync(cursor)["categories"]}
+        self.assertEqual(names, {cat["name"] for cat in default_categories()})
+
+
+class SyncDeltaTests(APITestCase):
+    """A client that merges the deltas ends up with what a full sync returns."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="delta", password=None)
+        self.client.force_authenticate(self.user)
+        self.food = self.post("/api/categories/", {"name": "Food", "type": "expense", "color": "#000000"})
+        self.rent = self.post("/api/categories/", {"name": "Rent", "type": "expense", "color": "#000000"})
+        self.budget = self.post("/api/budgets/", {"category": self.rent, "amount": 500, "month": "2024-01-01"})
+        self.ids = [self.post_transaction(-n, "Food") for n in range(1, 6)]
+        snapshot = self.sync(0)
+        self.assertTrue(snapshot["full"])
+        self.copy = {kind: {row["id"]: row for row in snapshot[kind]} for kind in sync.KINDS.values()}
+        self.cursor = snapshot["seq"]
+
+    def post(self, url, body):
+        response = self.client.post(url, body, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def post_transaction(self, amount, category):
+        return self.post("/api/transactions/", {"amount": amount, "date": "2024-01-02", "category": category})
+
+    def sync(self, since):
+        response = self.client.get("/api/sync/", {"since": since})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def assertInSync(self):
+        delta = self.sync(self.cursor)
+        self.assertFalse(delta["full"])
+        for kind in sync.KINDS.values():
+            for row in delta[kind]:
+                self.copy[kind][row["id"]] = row
+            for object_id in delta["deleted"][kind]:
+                self.copy[kind].pop(object_id, None)
+        self.cursor = delta["seq"]
+        full = self.sync(0)
+        self.assertEqual(self.copy, {kind: {row["id"]: row for row in full[kind]} for kind in sync.KINDS.values()})
+        return delta
+
+    def test_nothing_changed(self):
+        delta = self.assertInSync()
+        self.assertEqual([delta[kind] for kind in sync.KINDS.values()], [[], [], []])
+
+    def test_single_writes(self):
+        new = self.post_transaction(-9, "Rent")
+        response = self.client.put(f"/api/transactions/{self.ids[0]}/",
+                                   {"amount": -1, "date": "2024-01-03", "category": "Rent"}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.client.delete(f"/api/transactions/{self.ids[1]}/").status_code, 204)
+        delta = self.assertInSync()
+        self.assertEqual(sorted(row["id"] for row in delta["transactions"]), sorted([new, self.ids[0]]))
+        self.assertEqual(delta["deleted"]["transactions"], [self.ids[1]])
+
+    def test_bulk_writes(self):
+        response = self.client.patch("/api/transactions/bulk/",
+                                     {"ids": self.ids[:2], "set": {"category": "Rent"}}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        response = self.client.post("/api/transactions/bulk-delete/", {"ids": self.ids[2:4]}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        delta = self.assertInSync()
+        self.assertEqual(sorted(delta["deleted"]["transactions"]), self.ids[2:4])
+
+    def test_category_delete_takes_its_budget(self):
+        self.post_transaction(-9, "Rent")
+        self.assertInSync()
+        self.assertEqual(self.client.delete(f"/api/categories/{self.rent}/").status_code, 204)
+        delta = self.assertInSync()
+        self.assertEqual((delta["deleted"]["categories"], delta["deleted"]["budgets"]), ([self.rent], [self.budget]))
+
+    def test_cursor_older_than_the_pruned_tombstones_resyncs_in_full(self):
+        self.client.delete(f"/api/transactions/{self.ids[0]}/")
+        after_delete = self.sync(self.cursor)["seq"]
+        Tombstone.objects.update(deleted_at=now() - timedelta(days=1))
+        self.assertEqual(sync.prune(now()), 1)
+        self.assertTrue(self.sync(self.cursor)["full"])
+        self.assertFalse(self.sync(after_delete)["full"])
+
+    def test_bad_cursor_is_a_400(self):
+        for since in ("-1", "abc"):
+            with self.subTest(since=since):
+                self.assertEqual(self.client.get("/api/sync/", {"since": since}).status_code, 400)
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from backend import tokens
+from backend.tokens import RecentlyBlacklisted, RefreshToken
+
+
+class RecentlyBlacklistedTests(SimpleTestCase):
+    def test_drops_the_least_recently_seen(self):
+        jtis = RecentlyBlacklisted(2)
+        jtis.add("a")
+        jtis.add("b")
+        self.assertIn("a", jtis)        # now "b" is the oldest
+        jtis.add("c")
+        self.assertEqual([jti in jtis for jti in "abc"], [True, False, True])
+
+    def test_clear(self):
+        jtis = RecentlyBlacklisted(2)
+        jtis.add("a")
+        jtis.clear()
+        self.assertNotIn("a", jtis)
+
+
+class BlacklistCacheTests(APITestCase):
+    def setUp(self):
+        tokens.blacklisted.clear()
+        self.user = get_user_model().objects.create_user(username="tokens", password=None)
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def post_refresh(self, token):
+        return self.client.post("/api/token/refresh/", {"refresh": token}, format="json")
+
+    def test_replayed_token_is_rejected_without_a_query(self):
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+
+    def test_blacklisted_elsewhere_is_still_rejected(self):
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 200)
+        # another process rotated it: this one never saw the jti
+        tokens.blacklisted.clear()
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+
+    def test_logout_blacklists(self):
+        response = self.client.post("/api/token/blacklist/", {"refresh": self.refresh}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+
+
+class PruneTests(APITestCase):
+    def test_deletes_expired_tokens_and_their_blacklist_rows(self):
+        user = get_user_model().objects.create_user(username="prune", password=None)
+        kept = RefreshToken.for_user(user)
+        for _ in range(3):
+            RefreshToken.for_user(user).blacklist()
+        now = aware_utcnow()
+        OutstandingToken.objects.exclude(jti=kept["jti"]).update(expires_at=now - timedelta(days=1))
+
+        self.assertEqual(tokens.prune_batch(now, batch_size=2), (2, 2))
+        self.assertEqual(tokens.prune_batch(now, batch_size=2), (1, 1))
+        self.assertEqual(tokens.prune_batch(now), (0, 0))
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [kept["jti"]])
+        self.assertFalse(BlacklistedToken.objects.exists())
@@ -0,0 +1,127 @@
+"""
+Refresh tokens with a per-process front for blacklist checks, and the
+housekeeping of simplejwt's token tables.
+
+With ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION every refresh
+blacklists the token it was given, and a token replayed after that (a
+client retrying with a stale token, two tabs racing) is looked up again
+each time. Blacklisting is permanent, so the jtis known to be
+blacklisted are kept in a bounded LRU and rejected without a query.
+Only positives are cached: a jti missing from the LRU may have been
+blacklisted by another process, so it still goes to the database. (That
+is also why there is no Bloom filter in front: a per-process filter
+cannot prove a token was not blacklisted elsewhere.)
+
+`prune` deletes expired outstanding tokens, and with them their
+blacklist rows, in short batches: once a token has expired its
+signature check rejects it, so neither row is needed any more.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework_simplejwt import serializers, tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.state import token_backend
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+PRUNE_BATCH_SIZE = 1000
+
+
+class RecentlyBlacklisted:
+    """Thread-safe bounded set of jtis, least recently seen dropped first."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._jtis = OrderedDict()
+
+    def __contains__(self, jti):
+        with self._lock:
+            if jti in self._jtis:
+                self._jtis.move_to_end(jti)
+                return True
+            return False
+
+    def add(self, jti):
+        with self._lock:
+            self._jtis[jti] = None
+            self._jtis.move_to_end(jti)
+            while len(self._jtis) > self.size:
+                self._jtis.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._jtis.clear()
+
+
+blacklisted = RecentlyBlacklisted(settings.TOKEN_BLACKLIST_CACHE_SIZE)
+
+
+class RefreshToken(tokens.RefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if jti in blacklisted:
+            raise TokenError("Token is blacklisted")
+        try:
+            super().check_blacklist()
+        except TokenError:
+            blacklisted.add(jti)
+            raise
+
+    def blacklist(self):
+        # the row almost always exists (for_user and outstand write it);
+        # find it by jti instead of loading the user to build its defaults
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token = OutstandingToken.objects.filter(jti=jti).first()
+        result = BlacklistedToken.objects.get_or_create(token=token) if token else super().blacklist()
+        blacklisted.add(jti)
+        return result
+
+    def outstand(self):
+        """The rotated token's row. Its user was loaded and checked by the refresh serializer."""
+        return OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                "user_id": self.payload.get(api_settings.USER_ID_CLAIM),
+                "created_at": self.current_time,
+                "token": str(self),
+                "expires_at": datetime_from_epoch(self.payload["exp"]),
+            },
+        )
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class TokenBlacklistSerializer(serializers.TokenBlacklistSerializer):
+    token_class = RefreshToken
+
+
+def expired_before():
+    """Tokens that expired before this can no longer pass verification."""
+    return aware_utcnow() - token_backend.get_leeway()
+
+
+def prune_batch(cutoff, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete up to `batch_size` outstanding tokens expired before `cutoff`,
+    oldest first, with their blacklist rows. Returns (outstanding, blacklisted)
+    counts; (0, 0) once nothing is left.
+    """
+    with transaction.atomic():
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=cutoff)
+            .order_by("expires_at").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+        _, deleted = OutstandingToken.objects.filter(id__in=ids).only("id").delete()
+    return (
+        deleted.get(OutstandingToken._meta.label, 0),
+        deleted.get(BlacklistedToken._meta.label, 0),
+    )
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 from django.urls import path
 from .views import RegisterUserView
 from rest_framework_simplejwt.views import (
@@ -10,10 +10,20 @@ from rest_framework_simplejwt.views import (
 
 urlpatterns = [
     path('transactions/', views.transaction_list, name='transaction_list'),
+    path('transactions/import/', views.transaction_import, name='transaction_import'),
+    path('transactions/export/', views.TransactionExportView.as_view(), name='transaction_export'),
+    path('transactions/bulk/', views.transaction_bulk_update, name='transaction_bulk_update'),
+    path('transactions/bulk-delete/', views.transaction_bulk_delete, name='transaction_bulk_delete'),
     path('transactions/<int:pk>/', views.transaction_detail, name='transaction_detail'),
     path('dashboard/', views.dashboard_summary, name='dashboard_summary'),
+    path('balance/', views.balance_timeline, name='balance_timeline'),
+    path('bundle/', views.bundle, name='bundle'),
+    path('sync/', views.sync_changes, name='sync'),
     path('budgets/', views.budget_list, name='budget_list'),
+    path('budgets/status/', views.budget_status, name='budget_status'),
     path('budgets/<int:pk>/', views.budget_detail, name='budget_detail'),
+    path('recurring/', views.recurring_list, name='recurring_list'),
+    path('recurring/<int:pk>/', views.recurring_detail, name='recurring_detail'),
     path('categories/', views.category_list, name='category_list'),
     path('categories/<int:pk>/', views.category_detail, name='category_detail'),
     path('categories/summary/', views.category_summary, name='category_summary'),
@@ -25,4 +35,10 @@ urlpatterns = [
     path('profile/', views.profile_view, name='profile'),
     path('users/set_password/', views.set_password, name='set-password'),
     path("analytics/annual-spending/", views.annual_spending, name="annual_spending"),
+    path("analytics/trends/", views.analytics_trends, name="analytics_trends"),
+    path("metrics/", views.metrics, name="metrics"),
+    # ASGI variants; same responses, independent queries run concurrently
+    path("async/dashboard/", async_views.dashboard_summary, name="async_dashboard_summary"),
+    path("async/analytics/annual-spending/", async_views.annual_spending, name="async_annual_spending"),
+    path("async/categories/summary/", async_views.category_summary, name="async_category_summary"),
 ]
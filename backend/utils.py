@@ -1,17 +1,24 @@
 # backend/utils.py  (new file or anywhere convenient)
 
+from django.conf import settings
+
+from . import sync
 from .models import Category
+from .response_cache import bump_on_commit
+
+
+def default_categories():
+    """The categories a new account starts with: settings.DEFAULT_CATEGORIES."""
+    return settings.DEFAULT_CATEGORIES
 
-DEFAULT_CATEGORIES = [
-    {"name": "Food",           "type": "expense", "color": "#FF7043"},
-    {"name": "Transportation", "type": "expense", "color": "#4FC3F7"},
-    {"name": "Utilities",      "type": "expense", "color": "#9E9E9E"},
-    {"name": "Entertainment",  "type": "expense", "color": "#BA68C8"},
-    {"name": "Income",         "type": "income",  "color": "#66BB6A"},
-]
 
 def create_default_categories(user):
-    """Create the 5 basic categories for a brand-new user."""
-    for cat in DEFAULT_CATEGORIES:
-        # unique_together = ("user","name") prevents duplicates
-        Category.objects.get_or_create(user=user, name=cat["name"], defaults=cat)
+    """Create the default categories for a brand-new user, in one INSERT. Call inside a transaction."""
+    # bulk_create skips the pre_save that stamps a change number, so take
+    # one for all of them, as the importer does
+    seq = sync.allocate(user.id)
+    # unique_together = ("user","name") skips any the user already has
+    Category.objects.bulk_create(
+        [Category(user=user, seq=seq, **cat) for cat in default_categories()], ignore_conflicts=True,
+    )
+    bump_on_commit(user.id)   # bulk_create sends no post_save
@@ -1,21 +1,41 @@
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Sum, Case, When, F
-from .models import Transaction, Budget, Category, Profile
+from .models import Transaction, Budget, Category, Profile, RecurringRule, Tombstone
 from .serializers import TransactionSerializer, BudgetSerializer, CategorySerializer, UserSerializer, ProfileSerializer
+from .serializers import RecurringRuleSerializer, validate_currency_code
+from .serializers import FastTransactionSerializer, FastBudgetSerializer, FastCategorySerializer
+from .serializers import FastRecurringRuleSerializer
+from .fastjson import json_response, wants_plain_json
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, parser_classes
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import authenticate, login
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from django.utils.timezone import now  
+from django.contrib.auth.hashers import make_password
+from django.utils.timezone import localdate, now
+from datetime import timedelta
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models.functions import ExtractYear
+from .authentication import StatelessJWTAuthentication
+from django.db import IntegrityError, transaction as db_transaction
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from . import analytics, balances, exports, reports, rollups, sync
+from .response_cache import bump_on_commit, cached_response
+from .instrumentation import render_metrics
+from .filters import TRANSACTION_FILTERS, active_filters, filter_transactions, parse_date
+from .importers import detect_format, import_transactions
+from .pagination import (
+    after_cursor, decode_cursor, paginate, parse_limit, stream_json_array, stream_ndjson,
+)
 
 @api_view(["GET"])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_response("annual_spending")
 def annual_spending(request):
     """
     For the current user, return
@@ -23,29 +43,31 @@ def annual_spending(request):
     where 'income' is the sum of positive amounts and 'expense'
     is the absolute sum of negative amounts.
     """
-    qs = (
-        Transaction.objects
-        .filter(user=request.user)
-        .annotate(year=ExtractYear("date"))
-        .values("year")
-        .annotate(
-            income=Sum(Case(When(amount__gt=0, then=F("amount")))),
-            expense=Sum(Case(When(amount__lt=0, then=F("amount")))),
-        )
-        .order_by("year")
-    )
-
-    data = [
-        {
-            "year":    row["year"],
-            "income":  float(row["income"]  or 0),
-            "expense": abs(float(row["expense"] or 0)),
-        }
-        for row in qs
-    ]
-    return Response(data)
+    return Response(reports.annual_spending(request.user))
+
+@api_view(["GET"])
+@authentication_classes([StatelessJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@cached_response("trends")
+def analytics_trends(request):
+    """
+    Income/expense series per ?period=day|week|month with a rolling mean
+    of expense over ?window periods, per-category month-over-month
+    deltas for the last ?months months and a linear expense forecast
+    ?horizon months ahead.
+    """
+    if analytics.np is None:
+        return Response({'error': 'Trend analytics require NumPy to be installed.'},
+                        status=status.HTTP_501_NOT_IMPLEMENTED)
+    try:
+        options = analytics.parse_options(request.query_params)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(analytics.trends(request.user, localdate(), **options))
+
 
 @api_view(['POST'])
+@authentication_classes([JWTAuthentication])  # reads the whole User row anyway
 @permission_classes([IsAuthenticated])
 def set_password(request):
     """
@@ -71,6 +93,7 @@ def set_password(request):
 
 
 @api_view(['GET', 'PUT'])
+@authentication_classes([JWTAuthentication])  # reads the whole User row anyway
 @permission_classes([IsAuthenticated])
 def profile_view(request):
     # Get or create the Profile for this user
@@ -85,9 +108,12 @@ def profile_view(request):
     email     = data.get('email')
     currency  = data.get('currency')
 
-    # Update currency
+    # Update currency; every aggregate is reported in it (backend.fx)
     if currency:
-        profile.currency = currency
+        try:
+            profile.currency = validate_currency_code(currency)
+        except ValidationError as exc:
+            return Response({'currency': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
         profile.save()
 
     # Update User fields
@@ -102,6 +128,7 @@ def profile_view(request):
     return Response(ProfileSerializer(profile).data)
 
 @api_view(['GET'])
+@authentication_classes([JWTAuthentication])  # reads the whole User row anyway
 @permission_classes([IsAuthenticated])
 def user_info(request):
     return Response({
@@ -132,11 +159,20 @@ class RegisterUserView(APIView):
         if not email or not password:
             return Response({'error': 'Email and password required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if User.objects.filter(email=email).exists():
+        # What create_user does, but with the (slow, deliberately) password
+        # hash computed before the transaction rather than inside it.
+        email = User.objects.normalize_email(email)
+        user = User(username=User.normalize_username(email), email=email, password=make_password(password))
+
+        # one transaction: the user, their Profile (post_save) and categories
+        try:
+            with db_transaction.atomic():
+                if User.objects.filter(email=email).exists():
+                    return Response({'error': 'User already exists'}, status=status.HTTP_400_BAD_REQUEST)
+                user.save()
+                create_default_categories(user)
+        except IntegrityError:      # a concurrent signup took the username
             return Response({'error': 'User already exists'}, status=status.HTTP_400_BAD_REQUEST)
-
-        user = User.objects.create_user(username=email, email=email, password=password)
-        create_default_categories(user)
         return Response({'message': 'User created successfully'}, status=status.HTTP_201_CREATED)
 
 class SessionLoginView(APIView):
@@ -159,24 +195,233 @@ def protected_view(request):
 @permission_classes([IsAuthenticated])
 def transaction_list(request):
     if request.method == 'GET':
-        transactions = Transaction.objects.filter(user=request.user).order_by('-date')
-        # e.g. in your transaction_list view
-        serializer = TransactionSerializer(transactions, many=True)
-
-        return Response(serializer.data)
+        # (date, id) gives a total order, which keyset pagination relies on
+        transactions = Transaction.objects.filter(user=request.user).order_by('-date', '-id')
+        params = request.query_params
+        cursor = params.get('cursor')
+
+        try:
+            # date_from/date_to, amount_min/amount_max, category, type, search
+            transactions = filter_transactions(transactions, params)
+            if cursor:
+                # validate up front so a bad cursor is a 400, not a broken stream
+                decode_cursor(cursor)
+
+            stream = params.get('stream')
+            if stream in ('json', 'ndjson'):
+                if cursor:
+                    transactions = after_cursor(transactions, cursor)
+                if stream == 'ndjson':
+                    return StreamingHttpResponse(
+                        stream_ndjson(transactions, TransactionSerializer),
+                        content_type='application/x-ndjson',
+                    )
+                return StreamingHttpResponse(
+                    stream_json_array(transactions, TransactionSerializer),
+                    content_type='application/json',
+                )
+
+            fast = wants_plain_json(request)
+            serializer_class = FastTransactionSerializer if fast else TransactionSerializer
+            # ?cursor= / ?limit= opt into pages; a bare GET keeps the old full list
+            if cursor or 'limit' in params:
+                limit = parse_limit(params.get('limit'))
+                page = paginate(transactions, serializer_class, cursor, limit)
+                return json_response(page) if fast else Response(page)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = serializer_class(transactions, many=True)
+        return json_response(serializer.data) if fast else Response(serializer.data)
     elif request.method == 'POST':
         serializer = TransactionSerializer(data=request.data, context={'request': request})
 
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            with db_transaction.atomic():
+                tx = serializer.save(user=request.user)
+                rollups.record(tx)
+                balances.record(tx)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def transaction_import(request):
+    """
+    POST /api/transactions/import/   (multipart, field "file")
+
+    Optional fields: "type" (csv|ofx|qfx|qif, defaults to the file
+    extension), "dedupe" ("false" to keep rows that already exist) and
+    "date_format" (strptime pattern for non-ISO CSV dates).
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'Upload a statement in the "file" field.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        kind = detect_format(upload.name, request.data.get('type'))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = import_transactions(
+            request.user,
+            upload,
+            kind=kind,
+            dedupe=str(request.data.get('dedupe', 'true')).lower() not in ('0', 'false', 'no'),
+            date_format=request.data.get('date_format') or None,
+        )
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result, status=status.HTTP_201_CREATED)
+
+class TransactionExportView(APIView):
+    """
+    GET /api/transactions/export/?format=csv|ndjson|parquet (default csv)
+
+    Streams every matching transaction, oldest first, in constant memory.
+    Takes the same filters as the list view (date_from, date_to,
+    category, amount_min, amount_max, type, search). A class so it can
+    keep DRF from treating ?format= as a renderer override.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer]
+    content_negotiation_class = exports.ExportNegotiation
+
+    def get(self, request):
+        name = request.query_params.get('format') or 'csv'
+        if name not in exports.FORMATS:
+            return json_response({'error': f"format must be one of: {', '.join(exports.FORMATS)}"},
+                                 status=status.HTTP_400_BAD_REQUEST)
+        content_type, extension, stream = exports.FORMATS[name]
+        if name == 'parquet' and exports.pq is None:
+            return json_response({'error': 'Parquet export requires pyarrow to be installed.'},
+                                 status=status.HTTP_501_NOT_IMPLEMENTED)
+        try:
+            transactions = filter_transactions(
+                Transaction.objects.filter(user=request.user).order_by('date', 'id'), request.query_params,
+            )
+        except ValueError as exc:
+            return json_response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(stream(transactions), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{extension}"'
+        return response
+
+
+MAX_BULK_IDS = 10000
+BULK_UPDATE_FIELDS = ('category', 'description', 'date')
+# tx_recurring_occurrence_uniq: a rule has at most one transaction per date
+OCCURRENCE_TAKEN = 'The recurring rule already has a transaction on that date.'
+
+
+def _bulk_selection(request):
+    """
+    The caller's transactions picked by {"ids": [...]} or {"filter": {...}}
+    (see backend.filters), as one queryset. Raises ValueError on bad input.
+    """
+    if not isinstance(request.data, dict):
+        raise ValueError('The request body must be a JSON object')
+    qs = Transaction.objects.filter(user=request.user)
+    ids = request.data.get('ids')
+    criteria = request.data.get('filter')
+
+    if ids:
+        if not isinstance(ids, list) or len(ids) > MAX_BULK_IDS:
+            raise ValueError(f'ids must be a list of at most {MAX_BULK_IDS} ids')
+        try:
+            qs = qs.filter(id__in=[int(i) for i in ids])
+        except (TypeError, ValueError) as exc:
+            raise ValueError('ids must be integers') from exc
+    if criteria:
+        if not isinstance(criteria, dict):
+            raise ValueError('filter must be an object')
+        # filter_transactions skips what it doesn't understand, which here
+        # would select (and update or delete) the whole ledger
+        unknown = set(criteria) - set(TRANSACTION_FILTERS)
+        if unknown:
+            raise ValueError(f'Unknown filter: {", ".join(sorted(unknown))}')
+        if not active_filters(criteria):
+            raise ValueError('filter must have at least one non-blank criterion')
+        qs = filter_transactions(qs, criteria)
+    if not ids and not criteria:
+        raise ValueError('Provide "ids" or a non-empty "filter"')
+    return qs
+
+
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated])
+def transaction_bulk_update(request):
+    """
+    PATCH /api/transactions/bulk/
+    {"ids": [1, 2, 3] | "filter": {...}, "set": {"category": "Food"}}
+
+    Only category, description and date can be changed in bulk.
+    """
+    try:
+        qs = _bulk_selection(request)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    changes = request.data.get('set')
+    if not isinstance(changes, dict) or not changes:
+        return Response({'error': 'Provide the fields to change in "set"'}, status=status.HTTP_400_BAD_REQUEST)
+    unsupported = set(changes) - set(BULK_UPDATE_FIELDS)
+    if unsupported:
+        return Response({'error': f'Cannot bulk-update: {", ".join(sorted(unsupported))}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = TransactionSerializer(data=changes, partial=True, context={'request': request})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    values = {k: v for k, v in serializer.validated_data.items() if k in BULK_UPDATE_FIELDS}
+    if 'category' in values:
+        # update() skips Transaction.save, so resolve the FK here
+        values['category_fk'] = Category.objects.filter(user=request.user, name=values['category']).first()
+
+    try:
+        with db_transaction.atomic():
+            if 'date' in values or 'category' in values:
+                new_month = values['date'].replace(day=1) if 'date' in values else None
+                rollups.apply(rollups.add_moved({}, qs, month=new_month, category=values.get('category')))
+            balance_deltas = balances.add_moved({}, qs, values['date']) if 'date' in values else {}
+            updated = qs.update(**values, seq=sync.allocate(request.user.id))
+            balances.apply(balance_deltas)
+    except IntegrityError:
+        return Response({'error': OCCURRENCE_TAKEN}, status=status.HTTP_400_BAD_REQUEST)
+    bump_on_commit(request.user.id)
+    return Response({'updated': updated})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def transaction_bulk_delete(request):
+    """
+    POST /api/transactions/bulk-delete/
+    {"ids": [1, 2, 3]} or {"filter": {...}}
+    """
+    try:
+        qs = _bulk_selection(request)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    with db_transaction.atomic():
+        rollups.apply(rollups.add_queryset({}, qs, sign=-1))
+        balance_deltas = balances.add_queryset({}, qs, sign=-1)
+        sync.bury(request.user.id, Tombstone.TRANSACTION, qs.values_list('id', flat=True))
+        # QuerySet.delete() would load every row to send post_delete; nothing
+        # cascades from Transaction, so issue the single DELETE directly.
+        deleted = qs._raw_delete(qs.db)
+        balances.apply(balance_deltas)
+    bump_on_commit(request.user.id)
+    return Response({'deleted': deleted})
+
 @api_view(['PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])        # require a logged-in user
 def transaction_detail(request, pk):
     try:
-        transaction = Transaction.objects.get(pk=pk)
+        transaction = Transaction.objects.get(pk=pk, user=request.user)
     except Transaction.DoesNotExist:
         return Response({'error': 'Transaction not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -189,95 +434,208 @@ def transaction_detail(request, pk):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with db_transaction.atomic():
+                    deltas = rollups.add_instance({}, transaction, sign=-1)
+                    balance_deltas = balances.add_instance({}, transaction, sign=-1)
+                    serializer.save()
+                    rollups.apply(rollups.add_instance(deltas, transaction))
+                    balances.apply(balances.add_instance(balance_deltas, transaction))
+            except IntegrityError:
+                return Response({'error': OCCURRENCE_TAKEN}, status=status.HTTP_400_BAD_REQUEST)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
-        transaction.delete()
+        with db_transaction.atomic():
+            rollups.record(transaction, sign=-1)
+            transaction.delete()
+            balances.record(transaction, sign=-1)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 @api_view(['GET'])
+@cached_response("dashboard")
 def dashboard_summary(request):
-    transactions = Transaction.objects.filter(user=request.user)
     current = now()
-    
-    monthly_spending = transactions.filter(
-        date__year=current.year,
-        date__month=current.month,
-        amount__lt=0
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    yearly_spending = transactions.filter(
-        date__year=current.year,
-        amount__lt=0
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    # Get total budget for the current month
-    monthly_budget = Budget.objects.filter(
-        month__year=current.year,
-        month__month=current.month
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    recent_transactions = transactions.order_by('-date')[:5]
-    serializer = TransactionSerializer(recent_transactions, many=True)
+    monthly, yearly, unconverted = reports.spending(request.user, current)
+    return Response(reports.dashboard(
+        monthly=monthly,
+        budget=reports.monthly_budget(request.user, current),
+        yearly=yearly,
+        recent=reports.recent_transactions(request.user),
+        unconverted=unconverted,
+    ))
 
-    return Response({
-        'monthlySpending': abs(monthly_spending),
-        'monthlyBudget': monthly_budget,
-        'yearlySpending': abs(yearly_spending),
-        'recentTransactions': serializer.data
-    })
+
+@api_view(['GET'])
+@cached_response("bundle")
+def bundle(request):
+    """
+    GET /api/bundle/?include=dashboard,annual,categories,budgets,budget_status
+    Several endpoints' responses in one round trip (default: all of them),
+    computed from one pass over the user's data; see reports.bundle.
+    """
+    include = request.query_params.get('include')
+    sections = set(reports.BUNDLE_SECTIONS)
+    if include:
+        sections = {name.strip() for name in include.split(',') if name.strip()}
+    unknown = sections - set(reports.BUNDLE_SECTIONS)
+    if unknown:
+        return Response(
+            {'error': f"unknown section(s) {', '.join(sorted(unknown))}; "
+                      f"include takes {', '.join(reports.BUNDLE_SECTIONS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(reports.bundle(request.user, sections, now()))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    """
+    GET /api/sync/?since=<seq>
+    Transactions, categories and budgets changed after change number
+    `since`, the ids deleted since then, and the number to send next time.
+    since=0 (the default) returns everything; see backend.sync.
+    """
+    try:
+        since = int(request.query_params.get('since', 0))
+    except ValueError:
+        since = -1
+    if since < 0:
+        return Response({'error': 'since must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+    changes = sync.changes(request.user, since)
+    return json_response(changes) if wants_plain_json(request) else Response(changes)
 
 
 @api_view(['GET', 'POST'])
 def budget_list(request):
     if request.method == 'GET':
-        budgets = Budget.objects.all()
+        budgets = Budget.objects.filter(category__user=request.user)
+        if wants_plain_json(request):
+            return json_response(FastBudgetSerializer(budgets, many=True).data)
         serializer = BudgetSerializer(budgets, many=True)
         return Response(serializer.data)
     elif request.method == 'POST':
-        serializer = BudgetSerializer(data=request.data)
+        serializer = BudgetSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            with db_transaction.atomic():    # with its change number (backend.sync)
+                serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['GET'])
+@cached_response("budget_status")
+def budget_status(request):
+    """Budget vs actual for ?month=YYYY-MM (default: this month)."""
+    today = localdate()
+    try:
+        month = reports.parse_month(request.query_params.get('month'), today)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(reports.budget_status(request.user, month, today))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_response("balance")
+def balance_timeline(request):
+    """
+    GET /api/balance/?from=YYYY-MM-DD&to=YYYY-MM-DD
+    Opening and closing balance plus the balance after each day with
+    activity. Defaults to the year up to today.
+    """
+    params = request.query_params
+    try:
+        end = parse_date(params['to'], 'to') if params.get('to') else localdate()
+        start = parse_date(params['from'], 'from') if params.get('from') else end - timedelta(days=365)
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'from must not be after to'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(balances.timeline(request.user, start, end))
+
+
 @api_view(['PUT', 'DELETE'])
 def budget_detail(request, pk):
     try:
-        budget = Budget.objects.get(pk=pk)
+        budget = Budget.objects.get(pk=pk, category__user=request.user)
     except Budget.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'PUT':
-        serializer = BudgetSerializer(budget, data=request.data)
+        serializer = BudgetSerializer(budget, data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            with db_transaction.atomic():
+                serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
-        budget.delete()
+        with db_transaction.atomic():
+            budget.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def recurring_list(request):
+    """
+    Recurring transactions. Due occurrences are created by the
+    materialize_recurring command, not when a rule is saved.
+    """
+    if request.method == 'GET':
+        rules = RecurringRule.objects.filter(user=request.user).order_by('id')
+        if wants_plain_json(request):
+            return json_response(FastRecurringRuleSerializer(rules, many=True).data)
+        return Response(RecurringRuleSerializer(rules, many=True).data)
+
+    serializer = RecurringRuleSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def recurring_detail(request, pk):
+    try:
+        rule = RecurringRule.objects.get(pk=pk, user=request.user)
+    except RecurringRule.DoesNotExist:
+        return Response({'error': 'Recurring rule not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'PUT':
+        serializer = RecurringRuleSerializer(rule, data=request.data, context={'request': request})
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    # DELETE: transactions already created stay, unlinked
+    rule.delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @api_view(["GET", "POST"])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def category_list(request):
     if request.method == "GET":
         categories = Category.objects.filter(user=request.user)
+        if wants_plain_json(request):
+            return json_response(FastCategorySerializer(categories, many=True).data)
         return Response(CategorySerializer(categories, many=True).data)
 
     # POST
     serializer = CategorySerializer(data=request.data, context={"request": request})
     if serializer.is_valid():
-        serializer.save(user=request.user)
+        with db_transaction.atomic():    # with its change number (backend.sync)
+            serializer.save(user=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["PUT", "DELETE"])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def category_detail(request, pk):
     try:
@@ -286,50 +644,50 @@ def category_detail(request, pk):
         return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == "PUT":
+        old_name = category.name
         serializer = CategorySerializer(category, data=request.data,
                                         context={"request": request})
         if serializer.is_valid():
-            serializer.save()          # user is unchanged
+            with db_transaction.atomic():
+                serializer.save()          # user is unchanged
+                if category.name != old_name:
+                    # keep the denormalized name in step on the transactions
+                    # (linked or not: the rollups group them by name), the
+                    # rules that create more of them and the rollups
+                    Transaction.objects.filter(user=request.user, category=old_name).update(
+                        category=category.name, category_fk=category, seq=category.seq,
+                    )
+                    RecurringRule.objects.filter(user=request.user, category=old_name).update(category=category.name)
+                    rollups.rename_category(request.user.id, old_name, category.name)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     # DELETE
-    category.delete()
+    with db_transaction.atomic():   # budgets go with it, each with a tombstone
+        category.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 @api_view(["GET"])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_response("category_summary")
 def category_summary(request):
     """
     Return totals per category **for this user only**.
     """
-    response_data = []
-    categories    = Category.objects.filter(user=request.user)
-
-    for cat in categories:
-        # Transactions already scoped to user in transaction_list,
-        # but we filter again for safety.
-        tx_qs = Transaction.objects.filter(user=request.user, category=cat.name)
-        total = tx_qs.aggregate(total=Sum("amount"))["total"] or 0
-
-        if cat.type == "income":
-            response_data.append({
-                "id":           cat.id,
-                "name":         cat.name,
-                "type":         cat.type,
-                "color":        cat.color,
-                "total_earned": max(total, 0)
-            })
-        else:
-            response_data.append({
-                "id":           cat.id,
-                "name":         cat.name,
-                "type":         cat.type,
-                "color":        cat.color,
-                "total_spent":  abs(min(total, 0))
-            })
-
-    return Response(response_data)
+    return Response(reports.category_summary(request.user))
+
 
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def metrics(request):
+    """
+    Prometheus text metrics for this process. Open unless METRICS_TOKEN
+    is set, in which case scrapers send "Authorization: Bearer <token>".
+    """
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return Response({"detail": "Invalid metrics token."}, status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
@@ -33,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
 
     # Third-party
     'rest_framework',
@@ -44,7 +48,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'backend.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -59,9 +63,30 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer','JWT'),
+    # refresh token classes with a blacklist cache (backend/tokens.py)
+    'TOKEN_REFRESH_SERIALIZER': 'backend.tokens.TokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'backend.tokens.TokenBlacklistSerializer',
 }
+TOKEN_BLACKLIST_CACHE_SIZE = 10000   # blacklisted jtis remembered per process (LRU)
+
+# Incremental sync (backend/sync.py)
+SYNC_TOMBSTONE_DAYS = 90   # deletes older than this are pruned; older cursors resync in full
+
+# Categories every new account starts with (backend/utils.py)
+DEFAULT_CATEGORIES = [
+    {"name": "Food",           "type": "expense", "color": "#FF7043"},
+    {"name": "Transportation", "type": "expense", "color": "#4FC3F7"},
+    {"name": "Utilities",      "type": "expense", "color": "#9E9E9E"},
+    {"name": "Entertainment",  "type": "expense", "color": "#BA68C8"},
+    {"name": "Income",         "type": "income",  "color": "#66BB6A"},
+]
+
+# StatelessJWTAuthentication (backend/authentication.py)
+AUTH_STATE_CACHE_SIZE = 4096      # accounts whose active flag is kept per process (LRU)
+AUTH_STATE_CACHE_SECONDS = 60     # a deactivated or deleted account is locked out within this
 
 MIDDLEWARE = [
+    'backend.instrumentation.RequestInstrumentationMiddleware',  # first, so it times everything
     'corsheaders.middleware.CorsMiddleware',  
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -95,11 +120,113 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# PostgreSQL when POSTGRES_DB is set (needs psycopg), else the SQLite file.
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', ''),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
     }
+
+# DB_PROFILE=production: persistent connections; on SQLite also WAL and
+# write locks taken up front. backend/database.py applies SQLITE_PRAGMAS
+# to every connection.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'development')
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,          # reuse a connection across requests
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+if DB_PROFILE == 'production' and DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    # BEGIN IMMEDIATE: a writer waits for the lock (busy_timeout) when
+    # it starts, instead of failing on the read-to-write upgrade.
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,         # ms
+        'cache_size': -64000,         # KiB (negative = size, not pages)
+        'mmap_size': 268435456,       # 256 MiB
+        'temp_store': 'MEMORY',
+    }
+
+# "responses" backs backend.response_cache, which must be shared by every
+# worker process: a write invalidates the entries only in the cache it
+# can reach. So it is off (a dummy cache) unless RESPONSE_CACHE names a
+# shared one: "file" (the processes of one host) or "redis" (any number
+# of hosts; RESPONSE_CACHE_URL, needs the redis package).
+RESPONSE_CACHE = os.environ.get('RESPONSE_CACHE', '')
+RESPONSE_CACHES = {
+    '': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'responses',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('RESPONSE_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+if RESPONSE_CACHE not in RESPONSE_CACHES:
+    raise ImproperlyConfigured("RESPONSE_CACHE must be unset, 'file' or 'redis'")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': RESPONSE_CACHES[RESPONSE_CACHE],
+}
+
+RESPONSE_CACHE_TIMEOUT = 600  # seconds; writes invalidate earlier
+
+# Currency conversion (backend/fx.py)
+FX_PIVOT = os.environ.get('FX_PIVOT', 'USD')   # cross rates go through this currency
+FX_RATE_CACHE_SIZE = 4096                      # rate lookups kept per process (LRU)
+FX_RATE_CACHE_SECONDS = 3600                   # newly loaded rates show up within this
+
+# Request instrumentation (backend/instrumentation.py)
+SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 500))
+DUPLICATE_QUERY_THRESHOLD = 5     # same SQL this many times in one request = likely N+1
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # if set, /api/metrics/ requires "Bearer <token>"
+
+LOG_DIR = BASE_DIR / 'logs'   # created on the first write, not at import
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_requests': {
+            'class': 'backend.instrumentation.LogFileHandler',
+            'filename': LOG_DIR / 'slow_requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'backend.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [